@@ -0,0 +1,158 @@
+'''
+ACCOUNT INDEX
+-------------
+checks that the account codes used by expenses, invoices and recurring fees exist in the chart of accounts, before they reach supabase.
+
+KEY NOTES:
+- Index: the validated chart of accounts rows of this run are kept in memory as (account_code, account_dup_code),
+  and cached to state/account_index.parquet for runs that don't include the chart of accounts (--only, daemon cycles) or when it fails.
+- Waiting: sources with account_code_cols wait for the chart of accounts task of the same run, then check against its result.
+  chart_of_accounts is the first spec in SOURCES and main.build_tasks keeps that order, so it has always started before anyone waits on it.
+- Failures: the index is only built (and cached) when the chart of accounts task went through, a failed task still releases the waiting sources,
+  they check against the cached index of the last successful run instead of a partial one.
+- Check: one left join per code column against the index (vectorized anti-join), codes that are missing from the index
+  or belong to an account_dup_code account are reported.
+- ACCOUNT_CHECK_MODE: 'flag' (default, report and still upload), 'reject' (report and don't upload) or 'off'.
+- Report: every failing row is saved to logs/account_check/<source>/<run id>.parquet with its id, column, code and reason.
+
+'''
+
+import threading
+import polars as pl
+import config
+import run_report
+
+COA_SOURCE = 'chart_of_accounts'
+CACHE_FILE = 'account_index.parquet'
+REPORT_DIR = 'account_check'
+WAIT_TIMEOUT = 900 # seconds a source waits for the chart of accounts before falling back to the cached index
+INDEX_SCHEMA = {'account_code': pl.Int64, 'account_dup_code': pl.Boolean}
+REPORT_SCHEMA = {'run_id': pl.String, 'source': pl.String, 'row_id': pl.String, 'field': pl.String,
+                 'account_code': pl.Int64, 'error_code': pl.String, 'message': pl.String}
+ERRORS = {
+    'unknown_account_code': 'Account code not found in the chart of accounts',
+    'duplicate_account_code': 'Account code belongs to a duplicate (account_dup_code) account',
+}
+
+_lock = threading.Lock()
+_index = None # INDEX_SCHEMA frame for this run, None until the chart of accounts is done or the cache is read
+_coa_frames = [] # validated chart of accounts pages of this run
+_coa_done = None # threading.Event, only set up when the chart of accounts is part of the run
+_coa_failed = False # the chart of accounts task of this run failed, its pages were not indexed
+_reports = {} # source key -> list of REPORT_SCHEMA frames
+
+def get_cache_file():
+    return config.state_path_dir / CACHE_FILE
+
+# starts a new run: forgets the last index, sources only wait for the chart of accounts when it runs too
+def begin_run(keys: list[str]):
+    global _index, _coa_done, _coa_failed
+    with _lock:
+        _index = None
+        _coa_failed = False
+        _coa_frames.clear()
+        _reports.clear()
+        _coa_done = threading.Event() if COA_SOURCE in keys else None
+
+def begin_source(spec):
+    with _lock:
+        _reports[spec.key] = []
+        if spec.key == COA_SOURCE:
+            _coa_frames.clear()
+
+# the index of this run: waits for the chart of accounts task (queued ahead of every other task), falls back to the cache from the last successful run
+def get_index() -> pl.DataFrame | None:
+    global _index
+    done = _coa_done
+    if done is not None and not done.wait(WAIT_TIMEOUT):
+        print(f'NOTE: The chart of accounts did not finish within {WAIT_TIMEOUT}s, checking against the cached account index.')
+    elif done is not None and _coa_failed:
+        print('NOTE: The chart of accounts task failed, checking against the cached account index.')
+
+    with _lock:
+        if _index is None and get_cache_file().exists():
+            _index = pl.read_parquet(get_cache_file())
+            print(f'NOTE: Checking account codes against the cached account index ({_index.height} accounts).')
+        return _index
+
+# chart of accounts pages are collected, every other source with account_code_cols is checked (and filtered when rejecting)
+def apply(spec, df: pl.DataFrame) -> pl.DataFrame:
+    if spec.key == COA_SOURCE:
+        if not df.is_empty():
+            with _lock:
+                _coa_frames.append(df.select(pl.col(name).cast(dtype) for name, dtype in INDEX_SCHEMA.items()))
+        return df
+
+    if config.ACCOUNT_CHECK_MODE == 'off' or not spec.account_code_cols or df.is_empty():
+        return df
+    index = get_index()
+    if index is None:
+        print('NOTE: No account index yet (chart of accounts not synced), account codes were not checked.')
+        return df
+
+    with run_report.stage('account check', rows=df.height):
+        rows = df.select(pl.col(spec.primary_key).cast(pl.String).alias('row_id'), *spec.account_code_cols).with_row_index('position')
+        failures = []
+        for col in spec.account_code_cols:
+            # left join keeps every row, no match (null account_dup_code) = code missing from the chart of accounts
+            joined = rows.select('position', 'row_id', pl.col(col).cast(pl.Int64).alias('account_code')).join(
+                index, on='account_code', how='left', maintain_order='left'
+            )
+            failures.append(
+                joined.with_columns(
+                    pl.when(pl.col('account_dup_code').is_null()).then(pl.lit('unknown_account_code'))
+                    .when(pl.col('account_dup_code')).then(pl.lit('duplicate_account_code'))
+                    .alias('error_code')
+                )
+                .filter(pl.col('error_code').is_not_null())
+                .select('position', 'row_id', pl.lit(col).alias('field'), 'account_code', 'error_code')
+            )
+        failed = pl.concat(failures)
+
+        report = failed.select(
+            pl.lit(run_report.run_id()).alias('run_id'), pl.lit(spec.key).alias('source'), 'row_id', 'field', 'account_code', 'error_code',
+            pl.col('error_code').replace_strict(ERRORS, return_dtype=pl.String).alias('message'),
+        )
+        with _lock:
+            _reports.setdefault(spec.key, []).append(report)
+
+        if config.ACCOUNT_CHECK_MODE == 'reject' and not failed.is_empty():
+            keep = ~pl.int_range(pl.len()).is_in(failed['position'].unique().implode())
+            return df.filter(keep)
+        return df
+
+# builds + caches the index once the chart of accounts is done, writes the report of every other source, always called (also on errors)
+# failed=True (the task raised or was closed half way) drops the pages collected so far instead of publishing a partial index
+def finish(spec, failed: bool = False):
+    global _index, _coa_failed
+    if spec.key == COA_SOURCE:
+        with _lock:
+            if failed:
+                _coa_failed = True
+            elif _coa_frames:
+                _index = pl.concat(_coa_frames).unique('account_code', keep='last', maintain_order=True)
+                config.state_path_dir.mkdir(exist_ok=True)
+                _index.write_parquet(get_cache_file())
+            _coa_frames.clear()
+            done = _coa_done
+        if done is not None:
+            done.set() # the waiting sources fall back to the cache when nothing was built
+        return None
+
+    with _lock:
+        frames = _reports.pop(spec.key, [])
+    report = pl.concat([pl.DataFrame(schema=REPORT_SCHEMA), *frames])
+    if report.is_empty():
+        return None
+
+    report_dir = config.log_path_dir / REPORT_DIR / spec.key
+    report_dir.mkdir(parents=True, exist_ok=True)
+    report_file = report_dir / f'{run_report.run_id()}.parquet'
+    report.write_parquet(report_file)
+
+    counts = dict(report.group_by('error_code').len().iter_rows())
+    action = 'rejected' if config.ACCOUNT_CHECK_MODE == 'reject' else 'flagged, still uploaded'
+    print(f'ACCOUNTS: {report['row_id'].n_unique()} rows with bad account codes {action} '
+          f'({counts.get('unknown_account_code', 0)} unknown, {counts.get('duplicate_account_code', 0)} duplicate accounts). '
+          f'Check logs/{report_file.relative_to(config.log_path_dir).as_posix()}')
+    return report_file
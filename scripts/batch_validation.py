@@ -0,0 +1,104 @@
+'''
+BATCH VALIDATION (TYPEADAPTER)
+------------------------------
+fast path that keeps pydantic as the judge but skips the per-row model object + model_dump(mode='json') round trip.
+
+KEY NOTES:
+- TypedDicts: every model gets a TypedDict twin built from its own fields, config and 'before' validators, so the rules live in one place (models/).
+- One Call: the whole tab goes through a single TypeAdapter(list[...]).validate_python() call, a second call re-validates the clean rows if anything failed.
+- Typed Frame: validated values go straight into a typed polars frame (Datetime, Date, Int64, ...), no JSON string conversion in between.
+- Errors: failures are grouped by row index into the same error frame the other engines produce, the engine renders the .logs entries from it.
+- Int Range: pydantic takes ints of any size, the ones past the Int64 column range are turned into int_overflow row errors before the frame build.
+- Set VALIDATION_MODE=typeadapter in .env to switch, see benchmarks/validation_benchmark.py for the side-by-side numbers.
+
+'''
+
+from datetime import date, datetime
+from functools import cache
+from typing import Annotated, NotRequired, Required, TypedDict
+import polars as pl
+from pydantic import BaseModel, BeforeValidator, TypeAdapter, ValidationError
+from columnar_validation import INT_OVERFLOW, resolve_type
+
+POLARS_TYPES = {
+    str: pl.String,
+    int: pl.Int64,
+    float: pl.Float64,
+    bool: pl.Boolean,
+    date: pl.Date,
+    datetime: pl.Datetime('us'),
+}
+
+# builds the TypedDict twin of a model, carrying over its config and 'before' validators
+@cache
+def typed_dict_for(model: type[BaseModel]) -> type:
+    validators = {}
+    for decorator in model.__pydantic_decorators__.field_validators.values():
+        if decorator.info.mode != 'before':
+            continue
+        for field in decorator.info.fields:
+            validators.setdefault(field, []).append(BeforeValidator(getattr(model, decorator.cls_var_name)))
+
+    fields = {}
+    for name, info in model.model_fields.items():
+        annotation = Annotated[info.annotation, *validators.get(name, [])] if name in validators else info.annotation
+        fields[name] = Required[annotation] if info.is_required() else NotRequired[annotation]
+
+    typed_dict = TypedDict(f'{model.__name__}Dict', fields)
+    typed_dict.__pydantic_config__ = model.model_config
+    return typed_dict
+
+INT64_RANGE = (-2**63, 2**63 - 1)
+
+@cache
+def get_adapter(model: type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(list[typed_dict_for(model)])
+
+# polars schema of the validated frame, straight from the model's field types
+def polars_schema(model: type[BaseModel]) -> dict:
+    return {name: POLARS_TYPES[resolve_type(info.annotation)[0]] for name, info in model.model_fields.items()}
+
+# int fields of the model, their values have to fit the Int64 column
+@cache
+def int_fields(model: type[BaseModel]) -> tuple[str, ...]:
+    return tuple(name for name, info in model.model_fields.items() if resolve_type(info.annotation)[0] is int)
+
+# fields of a validated row holding an int past the Int64 range
+def int_overflows(row: dict, fields: tuple[str, ...]) -> list[str]:
+    low, high = INT64_RANGE
+    return [name for name in fields if row.get(name) is not None and not low <= row[name] <= high]
+
+# validates every record in one call (records[0] sits on sheet row first_row), returns the typed valid frame and the error frame
+def validate_records(records: list[dict], model: type[BaseModel], first_row: int = 2):
+    adapter = get_adapter(model)
+    errors = {} # row index -> pydantic errors
+
+    try:
+        validated = adapter.validate_python(records)
+    except ValidationError as e:
+        for err in e.errors():
+            err['field'] = str(err['loc'][1]) if len(err['loc']) > 1 else '__root__' # loc is (row index, field)
+            errors.setdefault(err['loc'][0], []).append(err)
+        kept = [i for i in range(len(records)) if i not in errors]
+        validated = adapter.validate_python([records[i] for i in kept]) # only clean rows left, can't fail again
+    else:
+        kept = range(len(records))
+
+    # ints that don't fit Int64 would fail the whole frame build, they are row errors instead
+    fields = int_fields(model)
+    overflows = {i: int_overflows(row, fields) for i, row in zip(kept, validated)} if fields else {}
+    overflows = {i: names for i, names in overflows.items() if names}
+    if overflows:
+        validated = [row for i, row in zip(kept, validated) if i not in overflows]
+        for i, names in overflows.items():
+            errors[i] = [{'field': name, 'type': INT_OVERFLOW[0], 'msg': INT_OVERFLOW[1]} for name in names]
+
+    valid_df = pl.DataFrame(validated, schema=polars_schema(model), orient='row') if validated else pl.DataFrame(schema=polars_schema(model))
+
+    error_rows = []
+    for i in sorted(errors):
+        for err in errors[i]:
+            error_rows.append({'row_number': i + first_row, 'field': err['field'], 'error_code': err['type'], 'message': err['msg']})
+
+    error_df = pl.DataFrame(error_rows, schema={'row_number': pl.Int64, 'field': pl.String, 'error_code': pl.String, 'message': pl.String})
+    return valid_df, error_df
@@ -0,0 +1,77 @@
+'''
+LOCAL FAKES
+-----------
+stand-ins for google sheets and supabase, so the real pipeline code runs offline.
+
+KEY NOTES:
+- Sheets: FakeSpreadsheet answers the same calls sheet_source.py makes (values_batch_get, values_get, modified time) from in-memory grids.
+- Supabase: the real supabase client is used, only its http transport is swapped for an httpx.MockTransport that accepts every upsert.
+- Latency: an optional per-request delay on the fake supabase side simulates the network round trip.
+
+'''
+
+import re
+import threading
+import time
+import httpx
+from supabase import create_client, ClientOptions
+import sheet_source
+import supabase_upload
+
+FAKE_URL = 'http://localhost:54321'
+FAKE_KEY = 'eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.benchmark'
+
+class FakeSpreadsheet:
+    title = 'Synthetic Benchmark Sheet'
+
+    def __init__(self, grids: dict[str, list[list[str]]]):
+        self.grids = grids
+
+    def get_lastUpdateTime(self) -> str:
+        return '2026-01-01T00:00:00.000Z'
+
+    def values_batch_get(self, ranges: list[str]) -> dict:
+        return {'valueRanges': [{'values': self.grids.get(self.tab_of(r), [])} for r in ranges]}
+
+    # A1 ranges from the paged reader: 'Tab'!1:1 or 'Tab'!A2:Z5001
+    def values_get(self, range_name: str) -> dict:
+        tab, a1 = range_name.rsplit('!', 1)
+        grid = self.grids.get(self.tab_of(tab), [])
+        start, end = map(int, re.findall(r'\d+', a1))
+        return {'values': grid[start - 1:end]}
+
+    @staticmethod
+    def tab_of(range_name: str) -> str:
+        return range_name.split('!')[0].strip("'").replace("''", "'")
+
+# points sheet_source at the fake spreadsheet, every later fetch reads from `grids`
+def install_fake_sheet(grids: dict[str, list[list[str]]]):
+    sheet_source._spreadsheet = FakeSpreadsheet(grids)
+    sheet_source._available_tabs = list(grids)
+    sheet_source._row_counts = {tab: len(grid) for tab, grid in grids.items()}
+    sheet_source.clear_grids()
+
+class FakeSupabase:
+    def __init__(self, latency_ms: float = 0):
+        self.latency = latency_ms / 1000
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.bytes = 0
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        if self.latency:
+            time.sleep(self.latency)
+        with self.lock:
+            self.requests += 1
+            self.bytes += len(request.content)
+        return httpx.Response(201)
+
+# registers a real supabase client per schema that talks to the fake instead of the network
+def install_fake_supabase(schemas: set[str], latency_ms: float = 0) -> FakeSupabase:
+    fake = FakeSupabase(latency_ms)
+    supabase_upload.close_supabase_clients()
+    for schema in schemas:
+        http_client = httpx.Client(transport=httpx.MockTransport(fake.handler))
+        client = create_client(FAKE_URL, FAKE_KEY, options=ClientOptions(schema=schema, httpx_client=http_client))
+        supabase_upload._clients[schema] = (client, http_client)
+    return fake
@@ -0,0 +1,173 @@
+'''
+PIPELINE BENCHMARK
+------------------
+end to end timing of every source on synthetic sheets, with google sheets and supabase replaced by local fakes.
+
+KEY NOTES:
+- Sources: one synthetic tab per model (expenses 01/02, invoices, recurring fees, coa) at 1k / 100k / 1M rows, with a share of dirty cells.
+- Measured: get_validated_data() (fetch -> sanitize -> validate -> ids) and upload_to_supabase() (serialize -> upsert) per source and size,
+  plus the per-stage breakdown from run_report.py.
+- Comparable: results are saved to benchmarks/results/ as JSON with the git commit, versions and settings,
+  --compare <older.json> flags every case that got slower than --threshold (exit code 1, usable in CI).
+- Memory: peak_rss_mb is the process high-water mark, run one size at a time for exact per-size numbers.
+- Run from the scripts folder: python -m benchmarks.pipeline_benchmark --sizes 1k 100k --dirty 0.05 --modes pydantic columnar
+
+'''
+
+import argparse
+import dataclasses
+import io
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+import polars as pl
+import pydantic
+import config
+import account_index
+import dedup
+import run_report
+import sheet_source
+from ingestions.engine import get_validated_data
+from ingestions.sources import SOURCES
+from supabase_upload import upload_to_supabase
+from benchmarks.fakes import install_fake_sheet, install_fake_supabase
+from benchmarks.synthetic import make_grid
+
+SIZES = {'1k': 1_000, '100k': 100_000, '1m': 1_000_000}
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+
+def parse_size(text: str) -> int:
+    return SIZES.get(text.lower()) or int(text.replace('_', ''))
+
+# short commit hash, marked -dirty when tracked files have local changes
+def git_commit() -> str:
+    try:
+        run = lambda *args: subprocess.run(['git', *args], capture_output=True, text=True, check=True, cwd=RESULTS_DIR.parent).stdout.strip()
+        return run('rev-parse', '--short', 'HEAD') + ('-dirty' if run('status', '--porcelain', '--untracked-files=no') else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+# one source at one size, best of `repeat` runs (lowest total)
+def run_case(spec, rows: int, mode: str, dirty: float, repeat: int, latency_ms: float) -> dict:
+    config.VALIDATION_MODE = mode
+    grid = make_grid(spec.model, rows, dirty, unique_col=None if spec.id_prefix else spec.primary_key)
+    install_fake_sheet({spec.tab_name: grid})
+    del grid
+
+    best = None
+    for _ in range(repeat):
+        run_report.reset()
+        account_index.begin_run([spec.key])
+        dedup.begin_run([spec.key])
+        sheet_source.clear_grids()
+        fake = install_fake_supabase({spec.schema}, latency_ms)
+
+        with redirect_stdout(io.StringIO()): # the pipeline prints a lot, only the numbers matter here
+            start = time.perf_counter()
+            df = get_validated_data(spec)
+            validate_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            if not df.is_empty():
+                upload_to_supabase(df, spec.table)
+            upload_seconds = time.perf_counter() - start
+
+        total = validate_seconds + upload_seconds
+        result = {
+            'source': spec.key,
+            'rows': rows,
+            'mode': mode,
+            'valid_rows': df.height,
+            'rejected_rows': rows - df.height,
+            'validate_seconds': round(validate_seconds, 4),
+            'upload_seconds': round(upload_seconds, 4),
+            'total_seconds': round(total, 4),
+            'rows_per_sec': int(rows / total) if total > 0 else None,
+            'requests': fake.requests,
+            'upload_mb': round(fake.bytes / 1024 / 1024, 2),
+            'peak_rss_mb': run_report.peak_rss_mb(),
+            'stages': {s['stage']: s['seconds'] for s in run_report.summarize()},
+        }
+        if best is None or result['total_seconds'] < best['total_seconds']:
+            best = result
+    return best
+
+# prints every case next to the baseline file, returns how many got slower than the threshold
+def compare(results: list[dict], baseline_file: Path, threshold: float) -> int:
+    with open(baseline_file, encoding='utf-8') as f:
+        baseline = json.load(f)
+    previous = {(r['source'], r['rows'], r['mode']): r for r in baseline['results']}
+
+    print(f"\nCompared with {baseline_file.name} (commit {baseline['commit']}), threshold +{threshold:.0%}:")
+    regressions = 0
+    for r in results:
+        before = previous.get((r['source'], r['rows'], r['mode']))
+        if before is None or not before['total_seconds']:
+            continue
+        change = r['total_seconds'] / before['total_seconds'] - 1
+        flag = 'REGRESSION' if change > threshold else ''
+        regressions += bool(flag)
+        print(f"  {r['source']:<20}{r['rows']:>10}  {r['mode']:<12}{before['total_seconds']:>9.3f}s -> {r['total_seconds']:>9.3f}s {change:>+8.1%}  {flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='End to end benchmark of every source on synthetic sheets (fake google sheets + supabase).')
+    parser.add_argument('--sizes', nargs='+', default=['1k', '100k', '1m'], help='rows per tab, e.g. 1k 100k 1m 25000')
+    parser.add_argument('--sources', nargs='+', default=list(SOURCES), choices=list(SOURCES))
+    parser.add_argument('--modes', nargs='+', default=[config.VALIDATION_MODE], choices=['pydantic', 'typeadapter', 'columnar'])
+    parser.add_argument('--dirty', type=float, default=0.05, help='share of rows with one broken cell')
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--latency-ms', type=float, default=0, help='simulated supabase round trip per request')
+    parser.add_argument('--output', type=Path, help='results file (default: benchmarks/results/pipeline_<commit>_<time>.json)')
+    parser.add_argument('--compare', type=Path, help='older results file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10, help='slowdown that counts as a regression (0.10 = 10%%)')
+    args = parser.parse_args()
+
+    # everything stays local: no snapshot cache, logs + state (account index cache) in a temp folder, uploads through postgrest (the fake)
+    # synthetic account codes never match a chart of accounts, so the account check is off
+    config.SNAPSHOT_CACHE = False
+    config.ACCOUNT_CHECK_MODE = 'off'
+    config.LOAD_BACKEND = 'postgrest'
+    config.log_path_dir = Path(tempfile.mkdtemp(prefix='pipeline_benchmark_'))
+    config.state_path_dir = config.log_path_dir / 'state'
+
+    # the tabs are fake, sources without a tab name in .env benchmark under their key
+    specs = {key: SOURCES[key] if SOURCES[key].tab_name else dataclasses.replace(SOURCES[key], tab_name=key) for key in args.sources}
+
+    results = []
+    print(f"{'source':<20}{'rows':>10}  {'mode':<12}{'valid':>10}{'validate':>10}{'upload':>10}{'total':>10}{'rows/sec':>12}{'peak MB':>10}")
+    for size in args.sizes:
+        for mode in args.modes:
+            for key in args.sources:
+                r = run_case(specs[key], parse_size(size), mode, args.dirty, args.repeat, args.latency_ms)
+                results.append(r)
+                print(f"{r['source']:<20}{r['rows']:>10}  {r['mode']:<12}{r['valid_rows']:>10}{r['validate_seconds']:>9.3f}s{r['upload_seconds']:>9.3f}s"
+                      f"{r['total_seconds']:>9.3f}s{r['rows_per_sec'] or '-':>12}{r['peak_rss_mb'] or '-':>10}")
+
+    commit = git_commit()
+    output = args.output or RESULTS_DIR / f"pipeline_{commit}_{datetime.now():%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'commit': commit,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'polars': pl.__version__,
+            'pydantic': pydantic.VERSION,
+            'settings': {'dirty': args.dirty, 'repeat': args.repeat, 'latency_ms': args.latency_ms,
+                         'upload_batch_size': config.UPLOAD_BATCH_SIZE, 'upload_max_in_flight': config.UPLOAD_MAX_IN_FLIGHT},
+            'results': results,
+        }, f, indent=2)
+    print(f'\nResults saved to {output}')
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
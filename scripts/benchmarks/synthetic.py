@@ -0,0 +1,81 @@
+'''
+SYNTHETIC SHEETS
+----------------
+builds raw google sheets grids (header row + formatted string cells) for any of the pydantic models.
+
+KEY NOTES:
+- Shape: the columns and types come from the model itself, so every source (expenses, invoices, recurring fees, coa) gets a matching tab.
+- Sheet Look: cells look like what the sheets API hands back: '$1,234.50' amounts, M/D/YYYY and AM/PM dates, TRUE/FALSE flags.
+- Dirty Cells: a `dirty` share of the rows gets one broken cell (blank, 'n/a', '31/02/2026', ...), most of them end up in the .logs.
+- Deterministic: the same (model, rows, dirty, seed) always builds the same grid, so results stay comparable across commits.
+
+'''
+
+import random
+from datetime import date, datetime
+from pydantic import BaseModel
+from columnar_validation import resolve_type
+
+POOL_SIZE = 5_000 # distinct values per column, rows are drawn from the pool (fast even at 1M rows)
+
+DIRTY_VALUES = {
+    str: ['', '   '],
+    int: ['', 'abc', '12.5', 'n/a'],
+    float: ['', 'n/a', '$', '1,2,3.4.5'],
+    date: ['', '31/02/2026', '2026.03.14', 'TBD'],
+    datetime: ['', '13/45/2026 10:00:00', 'yesterday', '2026-02-30 10:00:00 AM'],
+    bool: [''],
+}
+
+def sheet_datetime(rng: random.Random) -> str:
+    dt = datetime(2026, rng.randint(1, 12), rng.randint(1, 28), rng.randint(0, 23), rng.randint(0, 59), rng.randint(0, 59))
+    if rng.random() < 0.5:
+        return f'{dt.month}/{dt.day}/{dt.year} {dt:%H:%M:%S}' # M/D/YYYY HH:MM:SS
+    return f'{dt:%Y-%m-%d} {dt:%I:%M:%S %p}' # YYYY-MM-DD hh:mm:ss AM
+
+def sheet_amount(rng: random.Random) -> str:
+    amount = rng.uniform(1, 25_000)
+    return rng.choice([f'${amount:,.2f}', f'{amount:,.2f}', f'{amount:.2f}', str(int(amount))])
+
+# pool of clean formatted values for one field, names decide the flavour (codes, emails, ...)
+def value_pool(name: str, field_type: type, rng: random.Random) -> list[str]:
+    if field_type is datetime:
+        return [sheet_datetime(rng) for _ in range(POOL_SIZE)]
+    if field_type is date:
+        return [f'{rng.randint(1, 12)}/{rng.randint(1, 28)}/2026' for _ in range(POOL_SIZE)]
+    if field_type is int:
+        return [str(rng.randint(1000, 9999)) for _ in range(POOL_SIZE)]
+    if field_type is float:
+        return [sheet_amount(rng) for _ in range(POOL_SIZE)]
+    if field_type is bool:
+        return ['TRUE', 'FALSE']
+    if 'sender' in name:
+        return ['ap@company.com', 'ops@company.com', 'cfo@company.com']
+    if 'status' in name or 'terms' in name or 'type' in name:
+        return [f'{name.split('_')[-1]} {i}' for i in range(5)]
+    return [f'{name.replace('_', ' ')} {i}' for i in range(POOL_SIZE)]
+
+# builds the raw grid of a tab for `model`, unique_col gets unique values (e.g. coa account codes)
+def make_grid(model: type[BaseModel], rows: int, dirty: float = 0.05, seed: int = 7, unique_col: str | None = None) -> list[list[str]]:
+    rng = random.Random(seed)
+    header = list(model.model_fields)
+    types = {}
+    columns = []
+    for name, info in model.model_fields.items():
+        field_type, optional = resolve_type(info.annotation)
+        types[name] = field_type
+        if name == unique_col:
+            column = [str(1000 + i) for i in range(rows)]
+        else:
+            column = rng.choices(value_pool(name, field_type, rng), k=rows)
+        if optional or not info.is_required():
+            for i in rng.sample(range(rows), k=int(rows * 0.3)): # optional cells are often left blank
+                column[i] = ''
+        columns.append(column)
+
+    # one broken cell in a `dirty` share of the rows
+    for i in rng.sample(range(rows), k=int(rows * dirty)):
+        col = rng.randrange(len(header))
+        columns[col][i] = rng.choice(DIRTY_VALUES[types[header[col]]])
+
+    return [header] + [list(row) for row in zip(*columns)]
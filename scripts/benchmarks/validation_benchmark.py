@@ -0,0 +1,103 @@
+'''
+VALIDATION BENCHMARK
+--------------------
+side-by-side timing of the validation engines on the same synthetic expenses tab.
+
+KEY NOTES:
+- Engines: the current per-row loop (model + model_dump), the TypeAdapter fast path and the columnar engine.
+- Input: sanitized string records, like the ones sanitize_frame() hands to validation, with a share of broken rows.
+- Run from the scripts folder: python -m benchmarks.validation_benchmark --rows 100000 --dirty 0.05
+
+'''
+
+import argparse
+import random
+import time
+import polars as pl
+from pydantic import ValidationError
+from models.expenses_01 import Expenses01Row
+import batch_validation
+import columnar_validation
+
+LOG_COLS = ['expense_record_date','expense_date','account_code','expense_description','expense_amount','expense_sender']
+
+# builds sanitized-looking expense records, a `dirty` share of them fails validation
+def make_records(rows: int, dirty: float, seed: int = 7) -> list[dict]:
+    rng = random.Random(seed)
+    records = []
+    for i in range(rows):
+        day = f'2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}'
+        record = {
+            'expense_record_date': f'{day}T{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00',
+            'expense_date': f'{day}T00:00:00',
+            'account_code': str(rng.randint(1000, 9999)),
+            'expense_description': f'expense line {i}',
+            'expense_amount': f'{rng.uniform(1, 5000):.2f}',
+            'expense_sender': rng.choice(['ap@company.com', 'ops@company.com', 'cfo@company.com']),
+            'expense_comments': rng.choice([None, 'reimbursed', 'card']),
+        }
+        if rng.random() < dirty:
+            record[rng.choice(['expense_date', 'account_code', 'expense_amount', 'expense_sender'])] = rng.choice(['', None, 'n/a'])
+        records.append(record)
+    return records
+
+# the loop every ingestion ran before (one model object + model_dump per row)
+def run_per_row(records: list[dict]):
+    validated_data, error_logs = [], []
+    for i, record in enumerate(records):
+        try:
+            validated_data.append(Expenses01Row(**record).model_dump(mode='json'))
+        except ValidationError as e:
+            row_values = ' | '.join([f'{col}: {record.get(col,'MISSING')}' for col in LOG_COLS])
+            clean_errors = '; '.join([f'{err['loc'][0]}: {err['msg']}' for err in e.errors()])
+            error_logs.append(f'(ROW {i + 2}) DATA: {row_values}\nERROR: {clean_errors}\n{'-'*100}\n')
+    return pl.DataFrame(validated_data), error_logs
+
+# the .logs entries are rendered from the error frame, the same way the engine does it
+def run_typeadapter(records: list[dict]):
+    valid_df, error_df = batch_validation.validate_records(records, Expenses01Row)
+    frame = pl.DataFrame(records, schema={col: pl.String for col in records[0]})
+    return valid_df, columnar_validation.format_error_logs(error_df, frame, LOG_COLS)
+
+def run_columnar(records: list[dict]):
+    frame = pl.DataFrame(records, schema={col: pl.String for col in records[0]})
+    valid_df, _, error_logs = columnar_validation.validate_frame(frame, Expenses01Row, LOG_COLS)
+    return valid_df, error_logs
+
+ENGINES = {
+    'per-row pydantic': run_per_row,
+    'typeadapter': run_typeadapter,
+    'columnar': run_columnar,
+}
+
+# best of `repeat` runs for every engine, all engines see the same records
+def run_benchmark(rows: int, dirty: float, repeat: int) -> list[dict]:
+    records = make_records(rows, dirty)
+    results = []
+    for name, engine in ENGINES.items():
+        engine([dict(r) for r in records[:100]]) # warm up (adapter / schema building)
+        timings = []
+        for _ in range(repeat):
+            batch = [dict(r) for r in records]
+            start = time.perf_counter()
+            valid_df, error_logs = engine(batch)
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        results.append({'engine': name, 'rows': rows, 'valid': valid_df.height, 'rejected': len(error_logs), 'seconds': round(best, 4), 'rows_per_sec': int(rows / best)})
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the validation engines on a synthetic expenses tab.')
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--dirty', type=float, default=0.05, help='share of rows that fail validation')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    results = run_benchmark(args.rows, args.dirty, args.repeat)
+    baseline = results[0]['seconds']
+    print(f"{'engine':<20}{'rows':>10}{'valid':>10}{'rejected':>10}{'seconds':>10}{'rows/sec':>12}{'speedup':>9}")
+    for r in results:
+        print(f"{r['engine']:<20}{r['rows']:>10}{r['valid']:>10}{r['rejected']:>10}{r['seconds']:>10}{r['rows_per_sec']:>12}{baseline / r['seconds']:>8.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+'''
+COLUMNAR VALIDATION
+-------------------
+batch alternative to the per-row pydantic loop. instead of building one model object per row,
+the rules are derived from the pydantic model once and checked against the whole (sanitized) frame.
+
+KEY NOTES:
+- Same Contracts: field types, optional fields and the validate_empty_fields rules all come from the existing models, nothing is redefined here.
+- Same Output: valid rows come back shaped like model_dump(mode='json') (dates as ISO strings), so the upload step doesn't care which engine ran.
+- Errors: rejected rows come back as an error frame (row_number, field, error_code, message) plus log entries in the usual .logs format.
+- Strict Models: for models with strict=True (chart of accounts) the row engines get numericised values (gspread numericise: commas dropped, then int, float, else the string),
+  so str fields reject numbers and int fields reject anything but whole numbers, the checks here do the same on the raw text.
+- Integers: int fields read the same strings pydantic does ('1_000', '12.00', not '1e3' or 'NaN'), whole numbers past the 64-bit range are rejected
+  as int_overflow by every engine (supabase stores them as bigint).
+  strict date/datetime fields are not mirrored (no strict model has one), they are still parsed from text.
+- Fallback: the per-row pydantic loop stays the default, set VALIDATION_MODE=columnar in .env to switch.
+
+'''
+
+import types
+from datetime import date, datetime
+from typing import Union, get_args, get_origin
+import polars as pl
+from pydantic import BaseModel
+import date_parsing
+
+# most sheet dates arrive as the first format (sanitize.py output), date_parsing.py picks the order per column
+DATETIME_FORMATS = ['%Y-%m-%dT%H:%M:%S', '%Y-%m-%d', '%Y-%m-%dT%H:%M:%S%.f', '%Y-%m-%d %H:%M:%S%.f', '%Y-%m-%dT%H:%M', '%Y-%m-%d %H:%M']
+ISO_DATETIME = '%Y-%m-%dT%H:%M:%S%.f'
+
+# (error_code, message) pairs, worded the same way pydantic words them
+MISSING = ('missing', 'Field required')
+EMPTY = ('value_error', 'Value error, Required fields cannot be empty')
+NULL = ('value_error', 'Value error, Required fields cannot be NULL')
+TYPE_ERRORS = {
+    str: ('string_type', 'Input should be a valid string'),
+    int: ('int_parsing', 'Input should be a valid integer, unable to parse string as an integer'),
+    float: ('float_parsing', 'Input should be a valid number, unable to parse string as a number'),
+    bool: ('bool_parsing', 'Input should be a valid boolean'),
+    date: ('date_from_datetime_parsing', 'Input should be a valid date or datetime'),
+    datetime: ('datetime_from_date_parsing', 'Input should be a valid datetime or date'),
+}
+INEXACT_DATE = ('date_from_datetime_inexact', 'Datetimes provided to dates should have zero time - e.g. be exact dates')
+STRICT_TYPE_ERRORS = {
+    str: ('string_type', 'Input should be a valid string'),
+    int: ('int_type', 'Input should be a valid integer'),
+    float: ('float_type', 'Input should be a valid number'),
+}
+INT_OVERFLOW = ('int_overflow', 'Input should fit in a 64-bit integer')
+INT_LITERAL = r'^\s*[+-]?\d+\s*$' # what int() accepts, numericise tries it before float()
+INT_TEXT = r'^[+-]?\d+(_\d+)*(\.0+)?$' # what pydantic reads as an int from a (stripped) string
+YEAR_FIRST = r'^\d{4}-' # polars' %Y also reads '26-01-05', pydantic wants 4 digits
+
+# unwraps Optional[X] into (X, True)
+def resolve_type(annotation) -> tuple[type, bool]:
+    if get_origin(annotation) in (Union, types.UnionType):
+        args = [a for a in get_args(annotation) if a is not type(None)]
+        return args[0], len(args) < len(get_args(annotation))
+    return annotation, False
+
+# fields covered by the model's validate_empty_fields validator
+def get_empty_checked_fields(model: type[BaseModel]) -> set[str]:
+    validator = model.__pydantic_decorators__.field_validators.get('validate_empty_fields')
+    return set(validator.info.fields) if validator else set()
+
+# parses ISO-ish strings with the shared date parser, failed values come back NULL and are reported as field errors
+def parse_datetimes(values: pl.Series) -> pl.Series:
+    text = values.cast(pl.String).str.strip_chars()
+    parsed, _ = date_parsing.parse_column(text.set(~text.str.contains(YEAR_FIRST).fill_null(True), None), DATETIME_FORMATS)
+    return parsed
+
+# the text gspread numericise reads as a number: commas dropped, values with '_' stay strings
+def numericise_text(raw: pl.Expr) -> pl.Expr:
+    return pl.when(~raw.str.contains('_', literal=True)).then(raw.str.replace_all(',', '', literal=True).str.strip_chars())
+
+# returns (parsed value, conversion failed) expressions for one field, strict models read numbers the way numericise does
+def convert(name: str, field_type: type, text: pl.Expr, strict: bool = False) -> tuple[pl.Expr, pl.Expr]:
+    if field_type is str:
+        return text, pl.lit(False)
+
+    clean = numericise_text(text) if strict and field_type in (int, float) else text.str.strip_chars()
+    if field_type is int:
+        # no float round trip: 'NaN' or '1e20' can't fail the cast and long ints keep every digit, NULL past the Int64 range (int_overflow)
+        readable = clean.str.contains(INT_TEXT).fill_null(False)
+        digits = clean.str.replace_all('_', '', literal=True).str.replace(r'\.0+$', '')
+        return pl.when(readable).then(digits.cast(pl.Int64, strict=False)), ~readable
+    if field_type is float:
+        number = clean.cast(pl.Float64, strict=False)
+        return number, number.is_null()
+    if field_type is bool:
+        # mirrors parse_arrayformula_bool: TRUE/FALSE strings, anything else falls back to bool(v)
+        upper = clean.fill_null('').str.to_uppercase()
+        parsed = pl.when(upper.is_in(['FALSE', '0', ''])).then(False).otherwise(True)
+        return parsed, pl.lit(False)
+
+    parsed = pl.col(f'parsed:{name}') # filled once by parse_datetimes() before the checks run
+    if field_type is date:
+        return parsed.dt.date().dt.to_string('%Y-%m-%d'), parsed.is_null()
+    return parsed.dt.to_string(ISO_DATETIME), parsed.is_null()
+
+# strict models: the python type numericise would hand pydantic doesn't match the field (a number for a str field, 12.5 for an int field)
+def strict_mismatch(field_type: type, raw: pl.Expr) -> pl.Expr:
+    text = numericise_text(raw)
+    is_int = text.str.contains(INT_LITERAL).fill_null(False)
+    is_number = is_int | text.cast(pl.Float64, strict=False).is_not_null()
+    if field_type is str:
+        return is_number
+    if field_type is int:
+        return ~is_int
+    return ~is_number
+
+# builds the value expression + the list of (condition, error) checks for one field, first failing check wins
+def field_rules(name: str, annotation, required: bool, empty_checked: bool, strip: bool, columns: list[str], strict: bool = False):
+    field_type, optional = resolve_type(annotation)
+
+    if name not in columns:
+        return pl.lit(None).alias(name), [(pl.lit(True), MISSING)] if required else []
+
+    raw = pl.col(name).cast(pl.String)
+    text = raw.str.strip_chars() if strip and field_type is str else raw
+    value, failed = convert(name, field_type, text, strict)
+    is_null = raw.is_null()
+
+    checks = []
+    if field_type is bool:
+        pass # bool(None) is False, so a blank flag is never an error
+    elif empty_checked:
+        checks += [(is_null, NULL), (raw.str.strip_chars() == '', EMPTY)]
+    elif not optional:
+        checks.append((is_null, TYPE_ERRORS[field_type]))
+    if strict and field_type in STRICT_TYPE_ERRORS:
+        checks.append((is_null.not_() & strict_mismatch(field_type, raw), STRICT_TYPE_ERRORS[field_type]))
+    else:
+        checks.append((is_null.not_() & failed, TYPE_ERRORS[field_type]))
+    if field_type is int:
+        checks.append((is_null.not_() & value.is_null(), INT_OVERFLOW)) # read as an int but past the Int64 range
+    if field_type is date:
+        parsed = pl.col(f'parsed:{name}')
+        checks.append((parsed != parsed.dt.truncate('1d'), INEXACT_DATE))
+    return value.alias(name), checks
+
+# collapses the checks into one expression holding the index of the first failing check (NULL when the field is fine)
+def first_failure(checks: list) -> pl.Expr:
+    if not checks:
+        return pl.lit(None, dtype=pl.UInt8)
+    expr = pl.when(checks[0][0]).then(pl.lit(0, dtype=pl.UInt8))
+    for i, (condition, _) in enumerate(checks[1:], start=1):
+        expr = expr.when(condition).then(pl.lit(i, dtype=pl.UInt8))
+    return expr.otherwise(None)
+
+# renders the error frame into the usual .logs entries, one per rejected row
+def format_error_logs(errors: pl.DataFrame, sanitized: pl.DataFrame, log_cols: list[str], first_row: int = 2) -> list[str]:
+    if errors.is_empty():
+        return []
+
+    per_row = (
+        errors.group_by('row_number', maintain_order=True)
+        .agg(pl.format('{}: {}', 'field', 'message').str.join('; ').alias('clean_errors'))
+    )
+    values = sanitized.with_row_index('row_number', offset=first_row).select(
+        pl.col('row_number').cast(pl.Int64),
+        *[(pl.col(c).cast(pl.String).fill_null('None') if c in sanitized.columns else pl.lit('MISSING')).alias(c) for c in log_cols],
+    )
+    row_values = pl.concat_str([pl.format(f'{c}: {{}}', pl.col(c)) for c in log_cols], separator=' | ')
+    entries = per_row.join(values, on='row_number', how='left').select(
+        pl.format('(ROW {}) DATA: {}\nERROR: {}\n{}\n', 'row_number', row_values, 'clean_errors', pl.lit('-' * 100))
+    )
+    return entries.to_series().to_list()
+
+# checks the whole sanitized frame against the model in one go, its first row sits on sheet row first_row
+def validate_frame(sanitized: pl.DataFrame, model: type[BaseModel], log_cols: list[str], first_row: int = 2):
+    empty_checked = get_empty_checked_fields(model)
+    strip = bool(model.model_config.get('str_strip_whitespace'))
+    strict = bool(model.model_config.get('strict'))
+    fields = list(model.model_fields)
+
+    # temporal columns are parsed once up front, every check below reuses them
+    temporal = [name for name, info in model.model_fields.items() if resolve_type(info.annotation)[0] in (date, datetime) and name in sanitized.columns]
+    frame = sanitized.with_columns([parse_datetimes(sanitized[name]).alias(f'parsed:{name}') for name in temporal])
+
+    values, failures, field_checks = [], [], {}
+    for name, info in model.model_fields.items():
+        value, checks = field_rules(name, info.annotation, info.is_required(), name in empty_checked, strip, sanitized.columns, strict)
+        values.append(value)
+        failures.append(first_failure(checks).alias(f'failed:{name}'))
+        field_checks[name] = [error for _, error in checks]
+
+    checked = frame.with_row_index('row_number', offset=first_row).select(
+        pl.col('row_number').cast(pl.Int64), *values, *failures
+    )
+    has_error = pl.any_horizontal([pl.col(f'failed:{f}').is_not_null() for f in fields])
+
+    # one error row per (row, field), in row order then model field order
+    error_schema = {'row_number': pl.Int64, 'field': pl.String, 'error_code': pl.String, 'message': pl.String}
+    error_frames = []
+    for i, f in enumerate(fields):
+        failed = checked.filter(pl.col(f'failed:{f}').is_not_null()).select('row_number', f'failed:{f}')
+        if failed.is_empty():
+            continue
+        lookup = pl.DataFrame({
+            f'failed:{f}': pl.Series(range(len(field_checks[f])), dtype=pl.UInt8),
+            'error_code': [code for code, _ in field_checks[f]],
+            'message': [message for _, message in field_checks[f]],
+        })
+        error_frames.append(
+            failed.join(lookup, on=f'failed:{f}', how='left', maintain_order='left')
+            .select('row_number', pl.lit(i).alias('field_order'), pl.lit(f).alias('field'), 'error_code', 'message')
+        )
+    errors = (
+        pl.concat(error_frames).sort('row_number', 'field_order', maintain_order=True).drop('field_order')
+        if error_frames else pl.DataFrame(schema=error_schema)
+    )
+
+    valid = checked.filter(~has_error).select(fields)
+    return valid, errors, format_error_logs(errors, sanitized, log_cols, first_row)
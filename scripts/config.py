@@ -7,12 +7,17 @@ this_script = Path(__file__).resolve() #absolute path of this script
 shared_root = this_script.parents[3] 
 project_root = this_script.parents[1] # rawdata_ingestion folder
 log_path_dir = project_root / 'logs' #logfile parent directory
+state_path_dir = project_root / 'state' # last synced row hashes for delta uploads
+cache_path_dir = project_root / 'cache' # raw sheet snapshots
 dotenv_path = shared_root / 'keys' / '.env'
 
-if not dotenv_path.exists():
-    raise FileNotFoundError(f'Unable to find .env at: {dotenv_path}')
+if dotenv_path.exists():
+    load_dotenv(dotenv_path)
 
-load_dotenv(dotenv_path)
+# called by the entry points before a run, importing config itself never fails so --help and tooling work without the keys folder
+def require_env():
+    if not dotenv_path.exists():
+        raise FileNotFoundError(f'Unable to find .env at: {dotenv_path}')
 
 # load settings from .env file 
 GOOGLE_SERVICE_ACCOUNT = os.getenv('GOOGLE_API_SERVICE_ACCOUNT') #variable name used in .env
@@ -23,6 +28,35 @@ EXPENSES01_TAB_NAME = os.getenv('EXPENSES01_TAB_NAME')
 INVOICES01_TAB_NAME = os.getenv('INVOICES01_TAB_NAME')
 RECURRING01_TAB_NAME = os.getenv('RECURRING01_TAB_NAME')
 
+# pipeline tuning
+MAX_WORKERS = int(os.getenv('PIPELINE_MAX_WORKERS', '4')) # how many tasks run at the same time
+VALIDATION_MODE = os.getenv('VALIDATION_MODE', 'pydantic').lower() # 'pydantic' (row by row), 'typeadapter' (one pydantic call per tab) or 'columnar' (whole frame at once)
+VALIDATION_WORKERS = int(os.getenv('VALIDATION_WORKERS', '0')) # processes for validating big tabs, 0/1 = validate in-process
+VALIDATION_PROCESS_MIN_ROWS = int(os.getenv('VALIDATION_PROCESS_MIN_ROWS', '100000')) # smaller tabs/pages stay in-process even with workers
+DEDUP_MODE = os.getenv('DEDUP_MODE', 'flag').lower() # duplicate transactions (dedup.py): 'flag' (report only), 'drop' (don't upload them) or 'off'
+ACCOUNT_CHECK_MODE = os.getenv('ACCOUNT_CHECK_MODE', 'flag').lower() # unknown/duplicate account codes (account_index.py): 'flag' (report only), 'reject' (don't upload them) or 'off'
+DELTA_SYNC = os.getenv('DELTA_SYNC', 'true').lower() == 'true' # only upload rows that changed since the last sync
+SHEET_PAGE_SIZE = int(os.getenv('SHEET_PAGE_SIZE', '0')) # rows per streamed sheet page, 0 = download every tab in one batch
+DATE_CACHE_SIZE = int(os.getenv('DATE_CACHE_SIZE', '50000')) # parsed date strings kept in memory across pages and runs, 0 = no cache
+LOG_DEBUG_LIMIT = int(os.getenv('LOG_DEBUG_LIMIT', '0')) # max repeated DEBUG lines of one kind in the log, 0 = no limit
+PROFILE = os.getenv('PIPELINE_PROFILE', 'false').lower() == 'true' # profile every task (same as main.py --profile)
+SNAPSHOT_CACHE = os.getenv('SNAPSHOT_CACHE', 'true').lower() == 'true' # reuse the local sheet snapshot when the spreadsheet didn't change
+
+# daemon.py (long running service mode)
+DAEMON_INTERVAL = float(os.getenv('DAEMON_INTERVAL', '900')) # seconds between syncs of a source
+DAEMON_INTERVALS = os.getenv('DAEMON_INTERVALS', '') # per source overrides, e.g. expenses_01=300,chart_of_accounts=3600
+DAEMON_PORT = int(os.getenv('DAEMON_PORT', '8765')) # local trigger endpoint on 127.0.0.1, 0 = off
+
 # Supabase (for the next step)
 SUPABASE_URL = os.getenv('SUPABASE_URL')
-SUPABASE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
\ No newline at end of file
+SUPABASE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
+SUPABASE_DB_URL = os.getenv('SUPABASE_DB_URL') # direct postgres connection string, only used by LOAD_BACKEND=postgres
+LOAD_BACKEND = os.getenv('LOAD_BACKEND', 'postgrest').lower() # 'postgrest' (batched upserts over the API) or 'postgres' (COPY + merge, needs psycopg)
+SUPABASE_POOL_SIZE = int(os.getenv('SUPABASE_POOL_SIZE', '10')) # kept-alive connections shared by every upload
+SUPABASE_TIMEOUT = float(os.getenv('SUPABASE_TIMEOUT', '60')) # seconds per request
+
+# Supabase upload batching
+UPLOAD_BATCH_SIZE = int(os.getenv('UPLOAD_BATCH_SIZE', '1000')) # rows per upsert request
+UPLOAD_MAX_IN_FLIGHT = int(os.getenv('UPLOAD_MAX_IN_FLIGHT', '4')) # batches sent at the same time, per table
+UPLOAD_MAX_RETRIES = int(os.getenv('UPLOAD_MAX_RETRIES', '3')) # retries per batch on transient errors
+UPLOAD_RETRY_BASE_DELAY = float(os.getenv('UPLOAD_RETRY_BASE_DELAY', '1.0')) # seconds, doubles on every retry
@@ -0,0 +1,207 @@
+'''
+PIPELINE DAEMON
+---------------
+long running service mode of main.py. the process stays up between syncs, so python, polars, pydantic, gspread and supabase
+are imported once, the google login and the supabase connection pools stay warm, and a sync costs seconds instead of a cold start.
+
+KEY NOTES:
+- Schedule: every source runs on its own interval (DAEMON_INTERVAL seconds by default, DAEMON_INTERVALS=expenses_01=300,chart_of_accounts=3600
+  to override per source), sources that are due together run as one cycle through main.run_tasks().
+- Trigger: a small http server on localhost (DAEMON_PORT) queues on-demand syncs:
+    curl -X POST localhost:8765/sync                 # every source
+    curl -X POST localhost:8765/sync/expenses_01     # one source
+    curl localhost:8765/status                       # last result + next run per source
+- Fresh Data: every cycle reads the current sheet (sheet_source.reset()) and only downloads the tabs of the sources that are due, delta sync and the snapshot cache work as in one-shot runs,
+  the run report and rejects get a new run id per cycle.
+- Output: everything is logged to logs/daemon.log, logs/main_ingestion_report.json is rewritten after every cycle.
+- Errors: a cycle that fails outside a task (google login, snapshot cache) is logged, its sources are marked 'error' and run again on their next schedule.
+- Stop: SIGTERM lets the running cycle finish first, Ctrl+C stops right away.
+
+'''
+
+import argparse
+import json
+import signal
+import threading
+import time
+import traceback
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import config
+from output_logging import setup_logging
+import run_report
+import sheet_source
+import validation_pool
+from ingestions.sources import SOURCES
+from supabase_upload import close_supabase_clients
+from main import build_tasks, run_tasks
+
+# seconds between runs per source key, DAEMON_INTERVALS entries override the default
+def get_intervals() -> dict[str, float]:
+    intervals = {key: config.DAEMON_INTERVAL for key in SOURCES}
+    for entry in filter(None, config.DAEMON_INTERVALS.split(',')):
+        key, _, seconds = entry.partition('=')
+        if key.strip() not in SOURCES:
+            raise ValueError(f'DAEMON_INTERVALS: unknown source {key.strip()!r}, expected one of {list(SOURCES)}')
+        intervals[key.strip()] = float(seconds)
+    return intervals
+
+class Scheduler:
+    def __init__(self, intervals: dict[str, float]):
+        self.intervals = intervals
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.stopped = threading.Event()
+        self.next_run = {key: time.monotonic() for key in intervals} # everything runs once at startup
+        self.triggered = set()
+        self.running = []
+        self.last = {} # key -> {'status', 'rows', 'finished_at'}
+
+    # queues sources for the next cycle (http trigger)
+    def trigger(self, keys: list[str]):
+        with self.lock:
+            self.triggered.update(keys)
+        self.wake.set()
+
+    def stop(self):
+        self.stopped.set()
+        self.wake.set()
+
+    # sources that are due now (interval passed or triggered), in SOURCES order
+    def due(self) -> list[str]:
+        now = time.monotonic()
+        with self.lock:
+            due = [key for key in self.intervals if key in self.triggered or self.next_run[key] <= now]
+            self.triggered.difference_update(due)
+            return due
+
+    def seconds_until_next(self) -> float:
+        with self.lock:
+            return max(0.0, min(self.next_run.values()) - time.monotonic())
+
+    # one sync cycle for the given sources, same flow and footer numbers as a main.py run
+    def run_cycle(self, keys: list[str]):
+        run_report.reset()
+        sheet_source.reset() # re-reads tab list + row counts, the google login is kept
+        with self.lock:
+            self.running = keys
+
+        width = 90
+        start = time.time()
+        print(f"\n{'-' * width}")
+        print(f"{f' SYNC CYCLE {datetime.now():%Y-%m-%d %H:%M:%S} ({len(keys)} sources) '.center(width, '-')}")
+        print(f"{'-' * width}")
+
+        # run_task catches per-task errors, this catches the rest (auth, snapshot cache, task setup) so the service stays up
+        try:
+            results = run_tasks(build_tasks(keys))
+        except Exception:
+            print(f'DAEMON: Sync cycle failed, retrying on the next schedule:\n{traceback.format_exc()}')
+            results = [None] * len(keys)
+
+        duration = round(time.time() - start, 2)
+        print(f"STATISTICS: {sum(r is not None for r in results)}/{len(keys)} tasks completed, {sum(filter(None, results))} rows in {duration}s")
+        run_report.print_summary()
+        run_report.save_report(config.log_path_dir / 'main_ingestion_report.json', duration)
+
+        finished = time.monotonic()
+        with self.lock:
+            self.running = []
+            for key, rows in zip(keys, results):
+                status = 'error' if rows is None else 'success' if rows else 'skipped'
+                self.last[key] = {'status': status, 'rows': rows, 'finished_at': datetime.now().isoformat(timespec='seconds')}
+                self.next_run[key] = finished + self.intervals[key]
+
+    # main loop: sleeps until the next source is due or a trigger comes in
+    def run(self):
+        while not self.stopped.is_set():
+            keys = self.due()
+            if keys:
+                self.run_cycle(keys)
+                continue
+            self.wake.wait(self.seconds_until_next())
+            self.wake.clear()
+
+    def status(self) -> dict:
+        now = time.monotonic()
+        with self.lock:
+            return {
+                'running': list(self.running),
+                'queued': sorted(self.triggered),
+                'sources': {
+                    key: {
+                        'interval_seconds': self.intervals[key],
+                        'next_run_in_seconds': round(max(0.0, self.next_run[key] - now), 1),
+                        **self.last.get(key, {'status': 'pending'}),
+                    }
+                    for key in self.intervals
+                },
+            }
+
+# POST /sync[/<source key>] queues a sync, GET /status reports the schedule
+def make_handler(scheduler: Scheduler):
+    class TriggerHandler(BaseHTTPRequestHandler):
+        def send_json(self, code: int, body: dict):
+            data = json.dumps(body, indent=2).encode()
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path.rstrip('/') == '/status':
+                self.send_json(200, scheduler.status())
+            else:
+                self.send_json(404, {'error': 'unknown path, use GET /status or POST /sync[/<source>]'})
+
+        def do_POST(self):
+            parts = [p for p in self.path.split('?')[0].split('/') if p]
+            if not parts or parts[0] != 'sync' or len(parts) > 2:
+                self.send_json(404, {'error': 'unknown path, use POST /sync or POST /sync/<source>'})
+                return
+            keys = parts[1:] or list(SOURCES)
+            unknown = [key for key in keys if key not in SOURCES]
+            if unknown:
+                self.send_json(404, {'error': f'unknown source {unknown[0]}', 'sources': list(SOURCES)})
+                return
+            scheduler.trigger(keys)
+            self.send_json(202, {'queued': keys})
+
+        def log_message(self, format, *args): # requests are not worth a line in the pipeline log
+            pass
+
+    return TriggerHandler
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Long running ingestion service: scheduled syncs per source + a local trigger endpoint.')
+    parser.add_argument('--port', type=int, default=config.DAEMON_PORT, help='trigger endpoint port on 127.0.0.1 (0 = no endpoint)')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    config.require_env()
+    setup_logging('daemon.log')
+    scheduler = Scheduler(get_intervals())
+
+    server = None
+    if args.port:
+        server = ThreadingHTTPServer(('127.0.0.1', args.port), make_handler(scheduler))
+        threading.Thread(target=server.serve_forever, name='trigger-endpoint', daemon=True).start()
+        print(f'DAEMON: Trigger endpoint on http://127.0.0.1:{server.server_port} (POST /sync[/<source>], GET /status)')
+    print(f'DAEMON: Intervals (seconds): {scheduler.intervals}')
+
+    signal.signal(signal.SIGTERM, lambda *_: scheduler.stop())
+    try:
+        scheduler.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if server is not None:
+            server.shutdown()
+        close_supabase_clients()
+        validation_pool.shutdown()
+        print('DAEMON: Stopped.')
+
+if __name__ == '__main__':
+    main()
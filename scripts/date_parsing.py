@@ -0,0 +1,87 @@
+'''
+DATE PARSING
+------------
+one date parser for the whole pipeline: sanitize.py uses it to turn sheet dates into ISO strings,
+columnar_validation.py to turn those ISO strings into datetimes.
+
+KEY NOTES:
+- Format Detection: the format is picked once per column from a sample of its distinct values,
+  the other candidate formats are only tried on the values it missed.
+- Repeated Values: sheets repeat the same dates over and over, only distinct values are parsed and mapped back onto the column.
+- Cache: parsed values are kept in a bounded LRU cache (DATE_CACHE_SIZE) shared by every page, task and run in the process.
+  columns with more distinct values than the cache holds (e.g. timestamps) skip it and are parsed in one vectorized pass.
+- Failures: values no format could read are counted per column, the caller reports the count instead of one line per value.
+
+'''
+
+import threading
+from collections import OrderedDict
+import polars as pl
+import config
+
+DETECT_SAMPLE = 200 # distinct values tried against every candidate format
+DATETIME = pl.Datetime('us')
+
+_lock = threading.Lock()
+_caches = {} # frozenset(formats) -> OrderedDict(text -> datetime | None)
+
+# candidate formats ordered by how many sampled values they read, the best one goes first
+def detect_formats(text: pl.Series, formats: list[str]) -> list[str]:
+    if len(formats) < 2:
+        return list(formats)
+    sample = text.drop_nulls().unique().head(DETECT_SAMPLE)
+    if sample.is_empty():
+        return list(formats)
+    hits = [sample.str.to_datetime(fmt, strict=False, time_unit='us').is_not_null().sum() for fmt in formats]
+    return [fmt for _, fmt in sorted(zip(hits, formats), key=lambda pair: -pair[0])] # stable, ties keep their order
+
+# parses with the first format, only the values it missed are retried with the others
+def parse_values(text: pl.Series, formats: list[str]) -> pl.Series:
+    parsed = text.str.to_datetime(formats[0], strict=False, time_unit='us')
+    for fmt in formats[1:]:
+        missed = (parsed.is_null() & text.is_not_null()).arg_true()
+        if missed.is_empty():
+            break
+        retried = text.gather(missed).str.to_datetime(fmt, strict=False, time_unit='us')
+        parsed = parsed.scatter(missed, retried)
+    return parsed
+
+# looks every distinct value up in the cache, only the misses are parsed (in one go) and added to it
+def parse_cached(distinct: pl.Series, formats: list[str]) -> pl.Series:
+    values = distinct.to_list()
+    with _lock:
+        cache = _caches.setdefault(frozenset(formats), OrderedDict())
+        found = {}
+        for value in values:
+            if value in cache:
+                cache.move_to_end(value)
+                found[value] = cache[value]
+
+    misses = [value for value in values if value not in found]
+    if misses:
+        parsed = parse_values(pl.Series(misses, dtype=pl.String), formats).to_list()
+        with _lock:
+            for value, result in zip(misses, parsed):
+                cache[value] = found[value] = result
+            while len(cache) > config.DATE_CACHE_SIZE:
+                cache.popitem(last=False)
+
+    return pl.Series([found[value] for value in values], dtype=DATETIME)
+
+# parses a text column with the candidate formats, returns (datetime column, values that failed to parse)
+def parse_column(text: pl.Series, formats: list[str]) -> tuple[pl.Series, int]:
+    formats = detect_formats(text, formats)
+    distinct = text.drop_nulls().unique()
+
+    if not config.DATE_CACHE_SIZE or distinct.len() > config.DATE_CACHE_SIZE:
+        parsed = parse_values(text, formats)
+    else:
+        parsed = text.replace_strict(distinct, parse_cached(distinct, formats), default=None, return_dtype=DATETIME)
+
+    failed = (parsed.is_null() & text.is_not_null()).sum()
+    return parsed.alias(text.name), failed
+
+# empties the cache (benchmarks, tests)
+def clear_cache():
+    with _lock:
+        _caches.clear()
@@ -0,0 +1,143 @@
+'''
+DEDUPLICATION
+-------------
+drops (or flags) rows that are the same business transaction as a row that was already seen, in the same tab or in another tab
+of the same group (expenses 01 and expenses 02 both land in the expenses schema).
+
+KEY NOTES:
+- Fingerprint: the spec's dedup_cols (date, amount, account code, description) are normalized (amounts rounded to cents,
+  text lowercased with collapsed spaces) and hashed into one 64-bit value per row.
+- Index: every kept row's fingerprint is stored with its source and id in a compact in-memory frame per group for the current run.
+- Priority: sources earlier in SOURCES win, a row in expenses_02 that already exists in expenses_01 is the duplicate.
+  a source waits until the sources ahead of it in its group are done, so the result doesn't depend on which thread finished first.
+- After IDs: dedup runs after id generation, a dropped row never shifts the ids of the rows after it.
+- DEDUP_MODE: 'flag' (default, keep and report), 'drop' (report and don't upload) or 'off'.
+- Report: every duplicate is saved to logs/duplicates/<source>/<run id>.parquet with the id it duplicates.
+
+'''
+
+import threading
+import polars as pl
+import config
+import run_report
+from ingestions.sources import SOURCES
+
+WAIT_TIMEOUT = 900 # seconds a source waits for the sources ahead of it before deduping without them
+DUPLICATES_DIR = 'duplicates'
+REPORT_SCHEMA = {'run_id': pl.String, 'source': pl.String, 'row_id': pl.String, 'duplicate_of_source': pl.String,
+                 'duplicate_of_id': pl.String, 'business_key': pl.String}
+INDEX_SCHEMA = {'fingerprint': pl.UInt64, 'source': pl.String, 'row_id': pl.String}
+
+_lock = threading.Lock()
+_index = {} # group -> list of INDEX_SCHEMA frames
+_reports = {} # source key -> list of REPORT_SCHEMA frames
+_done = {} # source key -> threading.Event, set once the source's rows are all in the index
+
+# starts a new run: forgets the last index and registers which sources take part (only those are waited for)
+def begin_run(keys: list[str]):
+    with _lock:
+        _index.clear()
+        _reports.clear()
+        _done.clear()
+        _done.update({key: threading.Event() for key in keys})
+
+# sources without a dedup_group only dedup against themselves
+def group_of(spec) -> str:
+    return spec.dedup_group or spec.key
+
+# called when a source starts, drops what it indexed before (reruns, benchmarks)
+def begin_source(spec):
+    with _lock:
+        _reports[spec.key] = []
+        group = group_of(spec)
+        if group in _index:
+            _index[group] = [frame.filter(pl.col('source') != spec.key) for frame in _index[group]]
+
+# sources of the same group that take priority over this one, in SOURCES order
+def earlier_sources(spec) -> list[str]:
+    keys = [key for key, other in SOURCES.items() if group_of(other) == group_of(spec)]
+    return keys[:keys.index(spec.key)]
+
+# normalized business key, the same transaction gives the same text no matter which engine or tab produced it
+def business_key(df: pl.DataFrame, cols: tuple[str, ...]) -> pl.Expr:
+    parts = []
+    for col in cols:
+        dtype = df.schema[col]
+        if dtype.is_float():
+            text = pl.col(col).round(2).cast(pl.String)
+        elif dtype == pl.Datetime:
+            text = pl.col(col).dt.to_string('%Y-%m-%dT%H:%M:%S')
+        elif dtype == pl.Date: # typeadapter mode keeps date fields as pl.Date
+            text = pl.col(col).dt.to_string('%Y-%m-%d')
+        elif dtype == pl.String:
+            text = pl.col(col).str.to_lowercase().str.replace_all(r'\s+', ' ').str.strip_chars()
+        else:
+            text = pl.col(col).cast(pl.String)
+        parts.append(text.fill_null(''))
+    return pl.concat_str(parts, separator='\x1f')
+
+# flags (or drops) the rows of df that were already seen, df is one validated frame (or page) with ids
+def apply(spec, df: pl.DataFrame) -> pl.DataFrame:
+    if config.DEDUP_MODE == 'off' or not spec.dedup_cols or df.is_empty():
+        return df
+
+    earlier = earlier_sources(spec)
+    for key in earlier:
+        event = _done.get(key) # sources that aren't part of this run are not waited for
+        if event is not None and not event.wait(WAIT_TIMEOUT):
+            print(f'NOTE: DEDUP did not get the rows of {key} within {WAIT_TIMEOUT}s, deduping without them.')
+
+    with run_report.stage('dedup', rows=df.height):
+        keyed = df.with_columns(business_key(df, spec.dedup_cols).alias('business_key'))
+        keyed = keyed.with_columns(
+            pl.col('business_key').hash(seed=0).alias('fingerprint'),
+            pl.col(spec.primary_key).cast(pl.String).alias('row_id'),
+        )
+        with _lock:
+            seen = [frame.filter(pl.col('source').is_in([*earlier, spec.key])) for frame in _index.get(group_of(spec), [])]
+        seen = pl.concat([pl.DataFrame(schema=INDEX_SCHEMA), *seen]).unique('fingerprint', keep='first', maintain_order=True)
+
+        # earlier rows win first (other tabs, earlier pages), then the first copy inside this frame
+        first_in_frame = pl.col('fingerprint').is_first_distinct()
+        matched = keyed.join(seen.rename({'source': 'seen_source', 'row_id': 'seen_id'}), on='fingerprint', how='left', maintain_order='left')
+        matched = matched.with_columns(
+            pl.coalesce('seen_source', pl.when(~first_in_frame).then(pl.lit(spec.key))).alias('duplicate_of_source'),
+            pl.coalesce('seen_id', pl.when(~first_in_frame).then(pl.col('row_id').first().over('fingerprint'))).alias('duplicate_of_id'),
+        )
+        is_duplicate = pl.col('duplicate_of_id').is_not_null()
+
+        duplicates = matched.filter(is_duplicate).select(
+            pl.lit(run_report.run_id()).alias('run_id'), pl.lit(spec.key).alias('source'), *list(REPORT_SCHEMA)[2:]
+        )
+        with _lock:
+            _index.setdefault(group_of(spec), []).append(
+                matched.filter(~is_duplicate).select('fingerprint', pl.lit(spec.key).alias('source'), 'row_id')
+            )
+            _reports.setdefault(spec.key, []).append(duplicates)
+
+        if config.DEDUP_MODE == 'drop':
+            return df.filter(matched.select(~is_duplicate).to_series())
+        return df
+
+# marks the source as done (sources behind it stop waiting) and writes its duplicates report, always called, also on errors
+def finish(spec):
+    with _lock:
+        frames = _reports.pop(spec.key, [])
+        event = _done.get(spec.key)
+    if event is not None:
+        event.set()
+
+    duplicates = pl.concat([pl.DataFrame(schema=REPORT_SCHEMA), *frames])
+    if duplicates.is_empty():
+        return None
+
+    report_dir = config.log_path_dir / DUPLICATES_DIR / spec.key
+    report_dir.mkdir(parents=True, exist_ok=True)
+    report_file = report_dir / f'{run_report.run_id()}.parquet'
+    duplicates.write_parquet(report_file)
+
+    own = duplicates.filter(pl.col('duplicate_of_source') == spec.key).height
+    action = 'dropped' if config.DEDUP_MODE == 'drop' else 'flagged, still uploaded'
+    print(f'DEDUP: {duplicates.height} duplicate rows {action} ({own} repeated in this tab, {duplicates.height - own} already in an earlier tab). '
+          f'Check logs/{report_file.relative_to(config.log_path_dir).as_posix()}')
+    return report_file
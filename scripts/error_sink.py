@@ -0,0 +1,94 @@
+'''
+ERROR SINK
+----------
+rejected rows saved as a structured dataset next to the .logs text files, so bad sheet data can be counted and queried across runs.
+
+KEY NOTES:
+- Layout: one parquet file per source per run, logs/rejects/<source>/<run id>.parquet.
+- Columns: run_id, source, table, row_number (sheet row), field, error_code, message and raw_values (the sheet row as downloaded, JSON).
+- Batched: every validation engine hands back the same error frame, the raw values are joined onto it in one go
+  and each source is written once per run (paged runs collect their pages first).
+- Querying: error_counts() aggregates every saved run with a lazy parquet scan,
+  or from the scripts folder: python -m error_sink --by field error_code
+
+'''
+
+import argparse
+import polars as pl
+import config
+import run_report
+
+REJECTS_DIR = 'rejects'
+
+# one row per (sheet row, failed field), what every validation engine returns
+ERROR_SCHEMA = {'row_number': pl.Int64, 'field': pl.String, 'error_code': pl.String, 'message': pl.String}
+REJECT_SCHEMA = {'run_id': pl.String, 'source': pl.String, 'table': pl.String, **ERROR_SCHEMA, 'raw_values': pl.String}
+
+def get_rejects_dir():
+    return config.log_path_dir / REJECTS_DIR
+
+# joins the raw sheet values of every rejected row onto the error frame, raw_frame's first row sits on sheet row first_row
+def build_rejects(spec, errors: pl.DataFrame, raw_frame: pl.DataFrame, first_row: int = 2) -> pl.DataFrame:
+    if errors.is_empty():
+        return pl.DataFrame(schema=REJECT_SCHEMA)
+
+    raw_values = (
+        raw_frame.with_row_index('row_number', offset=first_row)
+        .with_columns(pl.col('row_number').cast(pl.Int64))
+        .filter(pl.col('row_number').is_in(errors['row_number'].unique().implode()))
+        .select('row_number', pl.struct(raw_frame.columns).struct.json_encode().alias('raw_values'))
+    )
+    return errors.join(raw_values, on='row_number', how='left', maintain_order='left').select(
+        pl.lit(run_report.run_id()).alias('run_id'),
+        pl.lit(spec.key).alias('source'),
+        pl.lit(spec.table).alias('table'),
+        *ERROR_SCHEMA,
+        'raw_values',
+    )
+
+# writes one source's rejects for this run, returns the file (None when nothing was rejected)
+def write_rejects(spec, rejects: pl.DataFrame):
+    if rejects.is_empty():
+        return None
+    source_dir = get_rejects_dir() / spec.key
+    source_dir.mkdir(parents=True, exist_ok=True)
+    reject_file = source_dir / f'{run_report.run_id()}.parquet'
+    rejects.write_parquet(reject_file)
+    return reject_file
+
+# every saved reject of one source (or all of them) as a lazy frame
+def scan_rejects(source: str | None = None) -> pl.LazyFrame:
+    pattern = get_rejects_dir() / (source or '*') / '*.parquet'
+    if not any(get_rejects_dir().glob(f'{source or '*'}/*.parquet')):
+        return pl.LazyFrame(schema=REJECT_SCHEMA)
+    return pl.scan_parquet(pattern)
+
+# error counts across runs, most frequent first, e.g. by=('field',) or by=('source', 'field', 'error_code')
+# since is a run id (YYYYmmdd_HHMMSS), older runs are left out
+def error_counts(by: tuple[str, ...] = ('source', 'field'), source: str | None = None, since: str | None = None) -> pl.DataFrame:
+    rejects = scan_rejects(source)
+    if since:
+        rejects = rejects.filter(pl.col('run_id') >= since)
+    return (
+        rejects.group_by(list(by))
+        .agg(
+            pl.len().alias('errors'),
+            pl.col('run_id').n_unique().alias('runs'),
+            pl.col('run_id').max().alias('last_run'),
+        )
+        .sort('errors', *by, descending=[True] + [False] * len(by))
+        .collect()
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description='Validation error counts across every saved run (logs/rejects/).')
+    parser.add_argument('--by', nargs='+', default=['source', 'field'], choices=['source', 'table', 'field', 'error_code', 'run_id'])
+    parser.add_argument('--source', help='only this source, e.g. expenses_01')
+    parser.add_argument('--since', help='only runs from this run id on, e.g. 20260101_000000')
+    args = parser.parse_args()
+
+    with pl.Config(tbl_rows=-1, fmt_str_lengths=80):
+        print(error_counts(tuple(args.by), args.source, args.since))
+
+if __name__ == '__main__':
+    main()
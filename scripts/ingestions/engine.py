@@ -0,0 +1,263 @@
+'''
+INGESTION ENGINE
+----------------
+one engine for every google sheets tab, driven by the specs in sources.py.
+this replaces the five copy-pasted ingestion modules, so every optimization lands here once and applies to every source.
+
+KEY NOTES:
+- Flow: fetch (shared sheet source) -> sanitize (sanitize.py) -> validate (VALIDATION_MODE) -> log rejects -> transaction ids -> account codes (account_index.py) -> dedup (dedup.py).
+- Rejects: every engine returns an error frame, written as .logs text + a parquet dataset per run (error_sink.py).
+- Processes: with VALIDATION_WORKERS set, big tabs are validated in chunks on a process pool (validation_pool.py) and merged back in sheet order.
+- Engines: 'pydantic' (row by row, default), 'typeadapter' (batch_validation.py) or 'columnar' (columnar_validation.py).
+- Output: every source hands back one polars frame ready for supabase_upload.
+- Paging: with SHEET_PAGE_SIZE set, iter_validated_pages() yields one validated frame per sheet page instead, row numbers and ids carry on across pages.
+
+'''
+
+import hashlib
+import io
+from collections.abc import Iterator
+from contextlib import redirect_stdout
+import polars as pl
+from gspread.utils import numericise_all
+from pydantic import ValidationError
+import config
+import sheet_source
+import sanitize
+import columnar_validation
+import batch_validation
+import run_report
+import error_sink
+import validation_pool
+import account_index
+import dedup
+from ingestions.sources import SOURCES, SourceSpec
+
+# creates a visual break in the terminal logs
+def print_divider(title: str):
+    print(f'\n{'-'*90}')
+    print(f' PROCESS: {title.upper()} ')
+    print(f'{'-'*90}')
+
+# pulls the tab's raw grid from the shared sheet source as an all-string frame
+def get_raw_frame(spec: SourceSpec) -> pl.DataFrame:
+    sheet_source.fetch_all_tabs() # auth + download on first use, timed as their own stages
+    raw_frame = sheet_source.get_frame(spec.tab_name)
+    print(f'Successfully connected to sheet: {sheet_source.get_title()} | Tab Name: {spec.tab_name}')
+    return raw_frame
+
+# clean specific sheet strings that pydantic hates ($, commas, sheet dates) for the whole tab at once
+def sanitize_frame(spec: SourceSpec, raw_frame: pl.DataFrame) -> pl.DataFrame:
+    return sanitize.sanitize_frame(
+        raw_frame,
+        currency_cols=spec.currency_cols,
+        optional_currency_cols=spec.optional_currency_cols,
+        code_cols=spec.code_cols,
+        date_cols=spec.date_cols,
+        required_string_cols=spec.required_string_cols,
+        optional_string_cols=spec.optional_string_cols,
+    )
+
+# rows handed to the row-level engines, strict models get numericised sheet records (get_all_records() style) instead of strings
+def get_records(spec: SourceSpec, sanitized: pl.DataFrame) -> list[dict]:
+    if spec.numericise:
+        return [dict(zip(sanitized.columns, numericise_all(list(row)))) for row in sanitized.iter_rows()]
+    return sanitized.to_dicts()
+
+# runs the pydantic validation loop and collects one error row per failed field
+def validate_rows(spec: SourceSpec, records: list[dict], first_row: int = 2):
+    validated_data = []
+    error_rows = []
+    int_fields = batch_validation.int_fields(spec.model)
+
+    for i, record in enumerate(records):
+        row_number = i + first_row # sheets row number
+
+        try:
+            row = spec.model(**record).model_dump(mode='json')
+        except ValidationError as e:
+            for err in e.errors():
+                error_rows.append({'row_number': row_number, 'field': str(err['loc'][0]), 'error_code': err['type'], 'message': err['msg']})
+            continue
+
+        overflows = batch_validation.int_overflows(row, int_fields) # supabase stores ints as bigint
+        for name in overflows:
+            error_rows.append({'row_number': row_number, 'field': name, 'error_code': columnar_validation.INT_OVERFLOW[0], 'message': columnar_validation.INT_OVERFLOW[1]})
+        if not overflows:
+            validated_data.append(row)
+
+    return validated_data, pl.DataFrame(error_rows, schema=error_sink.ERROR_SCHEMA)
+
+# picks the validation engine (VALIDATION_MODE), all of them hand back the valid rows, an error frame (error_sink.ERROR_SCHEMA)
+# and the .logs entries rendered from it, first_row is the sheet row of raw_frame's first row so paged frames still log the real row numbers
+def validate_in_process(spec: SourceSpec, raw_frame: pl.DataFrame, first_row: int = 2):
+    with run_report.stage('sanitize', rows=raw_frame.height):
+        sanitized = raw_frame if spec.numericise else sanitize_frame(spec, raw_frame)
+
+    with run_report.stage('validate', rows=raw_frame.height):
+        if config.VALIDATION_MODE == 'columnar':
+            validated_df, error_df, error_logs = columnar_validation.validate_frame(sanitized, spec.model, spec.log_cols, first_row)
+            return validated_df, error_df, error_logs
+
+        records = get_records(spec, sanitized)
+        if config.VALIDATION_MODE == 'typeadapter':
+            validated_df, error_df = batch_validation.validate_records(records, spec.model, first_row)
+        else:
+            validated_data, error_df = validate_rows(spec, records, first_row)
+            validated_df = pl.DataFrame(validated_data)
+        return validated_df, error_df, columnar_validation.format_error_logs(error_df, sanitized, spec.log_cols, first_row)
+
+# process pool worker (validation_pool.py): validates one chunk with the parent's validation mode, prints are handed back to the parent's log
+def validate_chunk(raw_chunk: pl.DataFrame, first_row: int, key: str, mode: str):
+    config.VALIDATION_MODE = mode
+    output = io.StringIO()
+    with redirect_stdout(output):
+        validated_df, error_df, error_logs = validate_in_process(SOURCES[key], raw_chunk, first_row)
+    return validated_df, error_df, error_logs, output.getvalue()
+
+# big frames are split across the validation process pool, everything else validates in-process
+def validate(spec: SourceSpec, raw_frame: pl.DataFrame, first_row: int = 2):
+    if not validation_pool.should_use(raw_frame.height):
+        return validate_in_process(spec, raw_frame, first_row)
+
+    with run_report.stage('validate', rows=raw_frame.height): # sanitize runs inside the workers, so it's part of this stage
+        results = validation_pool.map_chunks(validate_chunk, raw_frame, first_row, spec.key, config.VALIDATION_MODE)
+
+    validated = [validated_df for validated_df, _, _, _ in results if validated_df.width] # chunks with no valid rows have no columns either
+    error_logs = []
+    for _, _, chunk_logs, output in results:
+        error_logs += chunk_logs
+        print(output, end='')
+    return (
+        pl.concat(validated, how='vertical_relaxed') if validated else pl.DataFrame(),
+        pl.concat([error_df for _, error_df, _, _ in results]),
+        error_logs,
+    )
+
+# writes validation errors to the logfile and the structured rejects to logs/rejects/
+def write_ingestion_logs(spec: SourceSpec, error_logs: list[str], rejects: pl.DataFrame):
+    if not error_logs:
+        return
+    config.log_path_dir.mkdir(exist_ok=True)
+    log_file = config.log_path_dir / spec.log_file
+    with open(log_file, 'w', encoding='utf-8') as f:
+        f.writelines(error_logs)
+    reject_file = error_sink.write_rejects(spec, rejects)
+    print(f'NOTE: {len(error_logs)} validation errors found. Check logs/{spec.log_file} (structured: logs/{reject_file.relative_to(config.log_path_dir).as_posix()})')
+
+# one text column per key field, temporal values rendered the same way no matter which engine produced them
+def id_key_text(df: pl.DataFrame, cols: list[str]) -> pl.Series:
+    parts = []
+    for col in cols:
+        if df.schema[col] == pl.Datetime:
+            text = pl.col(col).dt.to_string('%Y-%m-%dT%H:%M:%S')
+        elif df.schema[col] == pl.Date:
+            text = pl.col(col).dt.to_string('%Y-%m-%d')
+        else:
+            text = pl.col(col).cast(pl.String)
+        parts.append(text.fill_null(''))
+    return df.select(pl.concat_str(parts, separator='\x1f')).to_series()
+
+# stable ids from the row content: the same row keeps its id wherever it sits in the sheet
+# seen counts the digests of earlier pages (paging), so identical rows on different pages still get different ids
+def content_ids(spec: SourceSpec, df: pl.DataFrame, seen: dict[str, int] | None = None) -> pl.Expr:
+    cols = list(spec.id_key_cols) or [c for c in df.columns if c != spec.primary_key]
+    # hashlib instead of polars hashes, ids live in supabase and polars hashes change between versions
+    digests = [hashlib.blake2b(text.encode(), digest_size=8).hexdigest() for text in id_key_text(df, cols)]
+    digest = pl.Series(digests, dtype=pl.String)
+    occurrence = pl.int_range(pl.len()).over(digest) # identical rows get -1, -2, ... so upserts don't collide
+    if seen is not None:
+        occurrence = occurrence + pl.lit(digest.replace_strict(seen, default=0, return_dtype=pl.Int64))
+        for value, count in digest.value_counts().iter_rows():
+            seen[value] = seen.get(value, 0) + count
+    return (
+        pl.concat_str([pl.lit(f'{spec.id_prefix}-'), digest])
+        + pl.when(occurrence > 0).then(pl.format('-{}', occurrence)).otherwise(pl.lit(''))
+    )
+
+# generates the custom transaction ids, 'position' ids count the valid rows from 2 like the sheet rows (EXP-LN-000002)
+# paging carries start (position ids) and seen (hash ids) from page to page, so the ids match an unpaged run
+def add_transaction_ids(spec: SourceSpec, df: pl.DataFrame, start: int = 2, seen: dict[str, int] | None = None) -> pl.DataFrame:
+    if not spec.id_prefix:
+        return df
+    with run_report.stage('ids', rows=df.height):
+        if spec.id_strategy == 'hash':
+            return df.with_columns(content_ids(spec, df, seen).alias(spec.primary_key))
+        return df.with_columns(
+            pl.concat_str([pl.lit(f'{spec.id_prefix}-'), pl.int_range(start, start + pl.len()).cast(pl.String).str.zfill(6)])
+            .alias(spec.primary_key)
+        )
+
+# main function for ingesting data, where ingestion "happens" hehe
+def get_validated_data(spec: SourceSpec) -> pl.DataFrame:
+    account_index.begin_source(spec)
+    dedup.begin_source(spec)
+    failed = False
+    try:
+        # 0. visual divider
+        print_divider(spec.title)
+
+        # 1. extract
+        raw_frame = get_raw_frame(spec)
+        if raw_frame.is_empty():
+            print('Sheet is empty.')
+            return pl.DataFrame()
+
+        # 2. transform & validate
+        validated_df, error_df, error_logs = validate(spec, raw_frame)
+        write_ingestion_logs(spec, error_logs, error_sink.build_rejects(spec, error_df, raw_frame))
+
+        # 3. load into polars
+        if validated_df.is_empty():
+            print('No valid data found to process.')
+            return pl.DataFrame()
+
+        print(f'Validation complete. {validated_df.height} rows cleared.')
+
+        # 4. ids, account codes (flagged or rejected, see account_index.py), then duplicates (flagged or dropped, see dedup.py)
+        return dedup.apply(spec, account_index.apply(spec, add_transaction_ids(spec, validated_df)))
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        account_index.finish(spec, failed) # also on errors, sources waiting on this one must not hang
+        dedup.finish(spec)
+
+# paged version of get_validated_data: each sheet page is validated and handed on as soon as it arrives
+# the consumer (main.run_task) uploads every page before asking for the next one and closes the generator when it fails, that counts as a failed source
+def iter_validated_pages(spec: SourceSpec, page_size: int) -> Iterator[pl.DataFrame]:
+    valid_rows, error_logs, reject_frames = 0, [], []
+    seen_ids = {} # hash id digest -> rows so far
+    account_index.begin_source(spec)
+    dedup.begin_source(spec)
+    failed = False
+    try:
+        # 0. visual divider, inside the try: the sheet title is the first google call and may fail
+        print_divider(spec.title)
+        print(f'Streaming sheet: {sheet_source.get_title()} | Tab Name: {spec.tab_name} | {page_size} rows per page')
+
+        for first_row, raw_page in sheet_source.iter_pages(spec.tab_name, page_size):
+            # 1. transform & validate this page
+            validated_df, error_df, page_errors = validate(spec, raw_page, first_row)
+            error_logs += page_errors
+            reject_frames.append(error_sink.build_rejects(spec, error_df, raw_page, first_row))
+            print(f'Page rows {first_row}-{first_row + raw_page.height - 1}: {validated_df.height} cleared, {len(page_errors)} rejected.')
+            if validated_df.is_empty():
+                continue
+
+            # 2. ids continue where the previous page stopped, duplicates are checked against every earlier page too
+            page_df = dedup.apply(spec, account_index.apply(spec, add_transaction_ids(spec, validated_df, start=2 + valid_rows, seen=seen_ids)))
+            valid_rows += validated_df.height
+            yield page_df
+    except BaseException: # GeneratorExit too
+        failed = True
+        raise
+    finally:
+        write_ingestion_logs(spec, error_logs, pl.concat(reject_frames) if reject_frames else pl.DataFrame(schema=error_sink.REJECT_SCHEMA))
+        account_index.finish(spec, failed)
+        dedup.finish(spec)
+
+    if valid_rows:
+        print(f'Validation complete. {valid_rows} rows cleared.')
+    else:
+        print('No valid data found to process.')
@@ -0,0 +1,170 @@
+'''
+SOURCE SPECS
+------------
+one declarative spec per google sheets tab. the ingestion engine (engine.py) and the uploader read everything they need from here.
+
+KEY NOTES:
+- Adding a Tab: write the pydantic model, add a SourceSpec below and the tab name to .env, nothing else changes.
+- Lazy Models: specs point at their model by name ('models.expenses_01:Expenses01Row'), so reading the specs imports no pydantic model,
+  a run only imports the models of the sources it runs.
+- Cleanup Rules: currency, code, date and string columns tell sanitize.py what to clean before validation.
+- Routing: table, schema, primary key and timestamp column replace the old hardcoded TABLE_CONFIGS in supabase_upload.py.
+- IDs: sources with an id_prefix get generated transaction ids (e.g. EXP-LN-000002), the rest bring their own primary key.
+- Duplicates: dedup_cols + dedup_group let dedup.py drop or flag the same transaction showing up twice, in one tab or across tabs.
+- Account Codes: account_code_cols are checked against the chart of accounts of the same run (account_index.py).
+- Stable IDs: id_strategy='hash' builds ids from the row content (id_key_cols) instead of the row position, so inserting a row mid-sheet
+  doesn't shift every later id and rewrite the whole table. editing a key column gives the row a new id, the old one is reported as deleted.
+
+'''
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+import config
+import run_report
+
+if TYPE_CHECKING:
+    from pydantic import BaseModel
+
+@dataclass(frozen=True)
+class SourceSpec:
+    key: str # short name used for state files and lookups
+    task_name: str # name shown by main.py
+    title: str # process divider title
+    tab_name: str | None
+    model_ref: str # 'module:ClassName' of the pydantic model, imported on first use (see model)
+
+    # where the rows land in supabase
+    table: str
+    schema: str
+    primary_key: str
+    timestamp_col: str
+
+    # rejected rows
+    log_file: str
+    log_cols: tuple[str, ...]
+
+    # cleanup rules for sanitize.py
+    currency_cols: tuple[str, ...] = ()
+    optional_currency_cols: tuple[str, ...] = ()
+    code_cols: tuple[str, ...] = ()
+    date_cols: tuple[str, ...] = ()
+    required_string_cols: tuple[str, ...] = ()
+    optional_string_cols: tuple[str, ...] = ()
+    numericise: bool = False # strict models get get_all_records() style numbers instead of sanitized strings
+
+    id_prefix: str | None = None # generated transaction ids, None when the sheet has its own key
+    id_strategy: str = 'position' # 'position' (row order, shifts when a row is inserted) or 'hash' (row content, stable)
+    id_key_cols: tuple[str, ...] = () # columns behind 'hash' ids, empty means every validated column
+
+    # duplicate transactions (dedup.py), sources sharing a dedup_group are checked against each other, earlier specs win
+    dedup_cols: tuple[str, ...] = () # normalized business fields that identify one transaction, empty = no dedup
+    dedup_group: str | None = None
+
+    # columns holding chart of accounts codes, checked against the account index (account_index.py)
+    account_code_cols: tuple[str, ...] = ()
+
+    # the pydantic model, only imported when a run actually validates this source (timed as an 'import' stage)
+    @property
+    def model(self) -> type['BaseModel']:
+        module, _, name = self.model_ref.partition(':')
+        return getattr(run_report.timed_import(module), name)
+
+SOURCES = {spec.key: spec for spec in [
+    SourceSpec(
+        key='chart_of_accounts',
+        task_name='Chart of Accounts',
+        title='chart of accounts',
+        tab_name=config.COA_TAB_NAME,
+        model_ref='models.chart_of_accounts:ChartOfAccountsRow',
+        table='chart_of_accounts',
+        schema='accounting',
+        primary_key='account_code',
+        timestamp_col='account_updated_at',
+        log_file='coa_ingestion.logs',
+        log_cols=('account_code', 'account_name', 'account_description', 'account_parent', 'account_main_category',
+                  'account_sub_category', 'account_coa_category', 'account_in_expense_dashboard', 'account_dup_code'),
+        numericise=True,
+    ),
+    SourceSpec(
+        key='expenses_01',
+        task_name='Expenses 01',
+        title='expenses ingestion',
+        tab_name=config.EXPENSES01_TAB_NAME,
+        model_ref='models.expenses_01:Expenses01Row',
+        table='latest_expenses_01',
+        schema='expenses',
+        primary_key='expense_transaction_id',
+        timestamp_col='expense_record_updated_at',
+        log_file='expenses_01_ingestion.logs',
+        log_cols=('expense_record_date', 'expense_date', 'account_code', 'expense_description', 'expense_amount', 'expense_sender'),
+        currency_cols=('expense_amount',),
+        code_cols=('account_code',),
+        date_cols=('expense_record_date', 'expense_date'),
+        id_prefix='EXP-LN',
+        dedup_cols=('expense_date', 'expense_amount', 'account_code', 'expense_description'),
+        dedup_group='expenses',
+        account_code_cols=('account_code',),
+    ),
+    SourceSpec(
+        key='expenses_02',
+        task_name='Expenses 02',
+        title='expenses ingestion',
+        tab_name=config.EXPENSES02_TAB_NAME,
+        model_ref='models.expenses_02:Expenses02Row',
+        table='latest_expenses_02',
+        schema='expenses',
+        primary_key='expense_transaction_id',
+        timestamp_col='expense_record_updated_at',
+        log_file='expenses_02_ingestion.logs',
+        log_cols=('expense_record_date', 'expense_date', 'account_code', 'expense_description', 'expense_amount', 'expense_sender'),
+        currency_cols=('expense_amount',),
+        code_cols=('account_code',),
+        date_cols=('expense_record_date', 'expense_date'),
+        id_prefix='EXP-LN',
+        dedup_cols=('expense_date', 'expense_amount', 'account_code', 'expense_description'),
+        dedup_group='expenses',
+        account_code_cols=('account_code',),
+    ),
+    SourceSpec(
+        key='invoices_01',
+        task_name='Invoices 01',
+        title='invoices ingestion',
+        tab_name=config.INVOICES01_TAB_NAME,
+        model_ref='models.invoices_01:Invoices01Row',
+        table='latest_invoices_01',
+        schema='expenses',
+        primary_key='invoice_transaction_id',
+        timestamp_col='invoice_record_updated_at',
+        log_file='invoices_ingestion.logs',
+        log_cols=('invoice_record_date', 'invoice_date', 'invoice_item', 'invoice_total_cost', 'invoice_description', 'invoice_name', 'account_code'),
+        currency_cols=('invoice_total_cost',),
+        optional_currency_cols=('invoice_unit_price', 'invoice_qty'),
+        code_cols=('account_code',),
+        date_cols=('invoice_record_date', 'invoice_date'),
+        optional_string_cols=('invoice_item', 'invoice_description', 'invoice_name', 'invoice_comments', 'invoice_supplier_name', 'invoice_unit_type'),
+        id_prefix='INV-LN',
+        account_code_cols=('account_code',),
+    ),
+    SourceSpec(
+        key='recurring_01',
+        task_name='Recurring Fees',
+        title='recurring fee ingestion',
+        tab_name=config.RECURRING01_TAB_NAME,
+        model_ref='models.recurring_01:Recurring01Row',
+        table='latest_recurring_fees_01',
+        schema='expenses',
+        primary_key='recurring_fee_transaction_id',
+        timestamp_col='recurring_fee_record_updated_at',
+        log_file='recurring_fee_ingestion.logs',
+        log_cols=('recurring_fee_record_date', 'recurring_fee_date', 'recurring_fee_name', 'recurring_fee_amount', 'recurring_fee_status',
+                  'recurring_fee_payment_status', 'recurring_fee_account_code', 'recurring_fee_payment_terms'),
+        currency_cols=('recurring_fee_amount',),
+        code_cols=('recurring_fee_account_code',),
+        date_cols=('recurring_fee_record_date', 'recurring_fee_date'),
+        required_string_cols=('recurring_fee_name', 'recurring_fee_status', 'recurring_fee_payment_status', 'recurring_fee_payment_terms'),
+        optional_string_cols=('recurring_fee_type', 'recurring_fee_contract_duration', 'recurring_fee_comment'),
+        id_prefix='RCR-LN',
+        account_code_cols=('recurring_fee_account_code',),
+    ),
+]}
+
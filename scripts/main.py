@@ -7,50 +7,144 @@ this triggers specialized validation scripts for different data sources and hand
 
 KEY NOTES:
 - Data Flow: Models (Pydantic) -> Fetch (GSheets) -> Validate (Polars) -> Upload (Supabase).
+- Sources: Every tab is described by a spec in ingestions/sources.py and runs through the same engine (ingestions/engine.py).
 - Orchestration: One failure won't kill the whole run; the script will catch errors per task and move to the next.
+- Delta Sync: Only rows that are new or changed since the last successful sync are uploaded (DELTA_SYNC, see sync_state.py).
+- Concurrency: Tasks don't depend on each other, so they run in parallel (PIPELINE_MAX_WORKERS, default 4). Each task's log block is still printed in one piece.
+- Paging: SHEET_PAGE_SIZE streams each tab in fixed row ranges, every page is validated and upserted as it arrives so memory stays bounded.
+- Snapshots: Unchanged sheets are served from the local snapshot cache, --from-cache replays the last snapshot without contacting google (reruns after a supabase outage).
+- Multiprocess Validation: VALIDATION_WORKERS > 1 validates tabs bigger than VALIDATION_PROCESS_MIN_ROWS in chunks on a process pool.
+- Profiling: --profile (or PIPELINE_PROFILE=true) writes a cProfile + collapsed-stack file per task to logs/profiles/ and lists the hot functions in the footer.
 - Output Logs: Every run generates a brand new log file in the /logs directory.
 - Statistics: Logging doesn't only show fail/success, but also shows description, count of rows, time intervals, and other workflow metrics 
+- Cold Start: only light modules load at startup, --help returns instantly and --only expenses_01,invoices_01 imports just the models it needs.
+- Account Codes: account codes are checked against the chart of accounts of the same run (or the cached one), ACCOUNT_CHECK_MODE flags or rejects bad ones.
+- Stage Timings: import, auth, fetch, sanitize, validate, ids, account check, delta, serialize and upload are timed separately (run_report.py), totals go in the footer and logs/main_ingestion_report.json.
 
 '''
 
 import sys
 import os
 import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 import config
-from output_logging import setup_logging
+from output_logging import setup_logging, task_block
+import run_report
+import profiling
+from ingestions.sources import SOURCES # specs only, the pydantic models are imported per source when it runs
 
-log_file_path = setup_logging() # start logging before anything else
+# heavy modules (polars, gspread, pydantic, supabase) are imported after the arguments are parsed, timed as 'import' stages
+PIPELINE_MODULES = ['polars', 'sheet_source', 'ingestions.engine', 'account_index', 'dedup', 'sync_state', 'supabase_upload', 'validation_pool']
 
-from ingestions.chart_of_accounts import get_validated_data as get_coa_data
-from ingestions.expenses_02 import get_validated_data as get_expenses02_data
-from ingestions.expenses_01 import get_validated_data as get_expenses01_data
-from ingestions.invoices_01 import get_validated_data as get_invoices01_data
-from ingestions.recurring_01 import get_validated_data as get_recurring01_data
-from supabase_upload import upload_to_supabase
+def load_pipeline():
+    for name in PIPELINE_MODULES:
+        run_report.timed_import(name)
 
 def run_task(name, fetch_func, table_name):
+    import polars as pl
+    from supabase_upload import upload_to_supabase
+    from sync_state import detect_changes, load_state, report_changes, save_state
 
     start_time = time.time()
     
+    pages = []
     try:
-        df = fetch_func() 
-        
-        if not df.is_empty():
-            row_count = len(df)
-            upload_to_supabase(df, table_name)
+        result = fetch_func() # one frame, or an iterator of page frames when paging is on
+        pages = [result] if isinstance(result, pl.DataFrame) else result
+
+        previous, loaded = None, False
+        row_count, changed_rows, hashes = 0, 0, []
+        for df in pages:
+            if df.is_empty():
+                continue
+            if not loaded: # read once the engine is running, so a failure here still goes through its finish (sources waiting on this one)
+                previous, loaded = load_state(table_name), True
+            with run_report.stage('delta', rows=df.height):
+                changed_df, page_hashes = detect_changes(df, table_name, previous) # only new/changed rows go up
+            if not changed_df.is_empty():
+                upload_to_supabase(changed_df, table_name)
+            row_count += df.height
+            changed_rows += changed_df.height
+            hashes.append(page_hashes)
+
+        if row_count:
+            all_hashes = pl.concat(hashes)
+            report_changes(table_name, previous, all_hashes, changed_rows)
+            save_state(table_name, all_hashes) # only reached when every upload fully succeeded
             duration = round(time.time() - start_time, 2)
             
             print(f"STATUS: Processed {row_count} rows in {duration}s") # acts as a footer to each process block 
+            run_report.add_task(name, table_name, 'success', row_count, duration)
             return row_count
         else:
             print(f"STATUS: Skipped (No data found)")
+            run_report.add_task(name, table_name, 'skipped', 0, round(time.time() - start_time, 2))
             return 0
             
     except Exception as e:
         print(f"STATUS: ERROR - {str(e)}")
+        run_report.add_task(name, table_name, 'error', None, round(time.time() - start_time, 2))
         return None
+    finally:
+        if hasattr(pages, 'close'): # a paged engine stopped half way finishes its source now, not when it's garbage collected
+            pages.close()
+
+# runs every task on a thread pool, results come back in the same order as the tasks
+def run_tasks(tasks, max_workers=None):
+    max_workers = max(1, min(max_workers or config.MAX_WORKERS, len(tasks)))
+
+    def run_isolated(task):
+        with task_block(), run_report.task_context(task[0]), profiling.profile_task(task[0]): # keeps this task's lines (and stage timings) together
+            return run_task(*task)
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='task') as executor:
+        return list(executor.map(run_isolated, tasks))
+
+# one task per source spec (ingestions/sources.py), streamed page by page when SHEET_PAGE_SIZE is set
+# also starts a fresh dedup + account index for these sources (sources outside the run are not waited for)
+# tasks always follow SOURCES order, whatever order --only lists them in: a source only ever waits on sources ahead of it,
+# so with a single worker the source it waits on has already run instead of being queued behind it
+def build_tasks(keys=None):
+    from ingestions.engine import get_validated_data, iter_validated_pages
+    import account_index
+    import sheet_source
+    import dedup
+
+    specs = [spec for key, spec in SOURCES.items() if not keys or key in keys]
+    sheet_source.use_tabs([spec.tab_name for spec in specs]) # only these tabs are downloaded
+    account_index.begin_run([spec.key for spec in specs])
+    dedup.begin_run([spec.key for spec in specs])
+    if config.SHEET_PAGE_SIZE > 0:
+        return [(spec.task_name, partial(iter_validated_pages, spec, config.SHEET_PAGE_SIZE), spec.table) for spec in specs]
+    return [(spec.task_name, partial(get_validated_data, spec), spec.table) for spec in specs]
+
+# '--only expenses_01,invoices_01' -> ['expenses_01', 'invoices_01']
+def source_keys(text: str) -> list[str]:
+    keys = [key.strip() for key in text.split(',') if key.strip()]
+    unknown = [key for key in keys if key not in SOURCES]
+    if unknown or not keys:
+        raise argparse.ArgumentTypeError(f'unknown source(s) {unknown}, choose from: {','.join(SOURCES)}')
+    return keys
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Google Sheets -> Supabase ingestion pipeline.')
+    parser.add_argument('--only', type=source_keys, help=f'comma separated sources to run (default: all), from: {','.join(SOURCES)}')
+    parser.add_argument('--from-cache', action='store_true', help='replay the last local sheet snapshot instead of downloading (offline rerun)')
+    parser.add_argument('--profile', action='store_true', default=config.PROFILE, help='profile every task into logs/profiles/ (tasks run one at a time)')
+    return parser.parse_args()
 
 def main():
+    args = parse_args() # --help and bad arguments return before any heavy import or the log is touched
+    config.require_env()
+
+    # start logging before anything else, inside main() so validation workers (spawned processes re-import this file) don't reopen the log
+    log_file_path = setup_logging()
+    load_pipeline()
+    import sheet_source
+    import validation_pool
+    from supabase_upload import close_supabase_clients
     width = 90
     total_start = time.time()
     
@@ -59,17 +153,25 @@ def main():
     print(f"{' DATA INGESTION STARTED '.center(width, '-')}")
     print(f"{'-' * width}")
 
-    tasks = [
-        ("Chart of Accounts", get_coa_data, 'chart_of_accounts'),
-        ("Expenses 01", get_expenses01_data, 'latest_expenses_01'),
-        ("Expenses 02", get_expenses02_data, 'latest_expenses_02'),
-        ("Invoices 01", get_invoices01_data, 'latest_invoices_01'),
-        ("Recurring Fees", get_recurring01_data, 'latest_recurring_fees_01')
-    ]
+    if args.from_cache:
+        sheet_source.use_snapshots_only() # no google calls, validation + upload run on the last snapshot
+        print('MODE: Offline replay from the local snapshot cache')
 
-    results = []
-    for _, func, table in tasks:
-        results.append(run_task(_, func, table))
+    max_workers = None
+    if args.profile:
+        profiling.enable()
+        max_workers = 1 # only one cProfile can be active per process
+        print('MODE: Profiling, tasks run one at a time')
+
+    if args.only:
+        print(f"MODE: Only running {', '.join(args.only)}")
+    tasks = build_tasks(args.only)
+
+    try:
+        results = run_tasks(tasks, max_workers)
+    finally:
+        close_supabase_clients() # every task shares the same pooled clients, close them once
+        validation_pool.shutdown()
 
     # workflow finished header
     print(f"\n{'-' * width}")
@@ -85,6 +187,9 @@ def main():
     print(f"- Total Time: {total_duration}s")
     print(f"- Tasks: {len(successful_tasks)}/{len(tasks)} completed successfully")
     print(f"- Total Rows Processed: {total_rows}")
+    run_report.print_summary()
+    profiling.print_summary()
+    report_file = run_report.save_report(config.log_path_dir / 'main_ingestion_report.json', total_duration)
 
     # relative path for cleaner output
     relative_path = log_file_path.relative_to(config.shared_root) if 'shared_root' in dir(config) else log_file_path
@@ -92,6 +197,7 @@ def main():
 
     print(f"\n{'='*width}")
     print(f" LOG SAVED TO: {clean_path} ".center(width, ' ')) # the first footer you saw was a sub footer, this one is a footer footer 
+    print(f" RUN REPORT: {report_file.name} ".center(width, ' '))
     print(f"{'='*width}\n")
 
 if __name__ == '__main__':
@@ -4,31 +4,190 @@ DUAL LOGGING
 this scripts redirects all standard output and errors to both the terminal and a local log file.
 
 KEY NOTES:
-- overwrites 'main_ingestions.log' on every run.
-- also captures system crashes from stderr that would otherwise be lost. 
+- overwrites 'main_ingestions.log' on every run (daemon.py logs to 'daemon.log' instead).
+- also captures system crashes from stderr that would otherwise be lost.
 - uses 'Tee' class just to somewhat mimic the Unix tee command hehe.
+- thread safe: tasks running in parallel wrap their work in task_block() so each task's lines are written as one piece.
+- non-blocking: print() only drops the text on a queue, a background writer thread does the actual (buffered) terminal + file writes.
+- always flushed: the writer is drained on exit and on crashes (atexit + excepthook, threading.excepthook for worker threads), so the end of the log is never lost.
+  lines printed after the log is closed (threads still running after Ctrl+C) still reach the terminal.
+  if the writer thread dies or hangs, print() writes directly and flush() stops waiting after FLUSH_TIMEOUT, a broken writer never blocks the pipeline.
+- repeated DEBUG lines: with LOG_DEBUG_LIMIT set, only the first N lines of each kind are written and the rest are counted in one summary line.
 
 '''
 
+import atexit
+import queue
+import re
 import sys
+import threading
+import traceback
+from collections import Counter
+from contextlib import contextmanager
 import config
 
+LOG_BUFFER_SIZE = 1024 * 1024 # bytes held in memory before the log file is written
+FLUSH_INTERVAL = 1.0 # seconds of quiet before the writer flushes anyway
+FLUSH_TIMEOUT = 10 # seconds flush() and close() wait on the writer before writing out themselves
+DEBUG_PREFIX = 'DEBUG:'
+
+_local = threading.local() # holds the output buffer of the task running on each thread
+_STOP = object()
+
 class Tee(object):
-    def __init__(self, filename):
+    def __init__(self, filename, debug_limit: int = 0):
         self.terminal = sys.stdout
-        self.log = open(filename, 'w', encoding='utf-8')
-    
+        self.log = open(filename, 'w', encoding='utf-8', buffering=LOG_BUFFER_SIZE)
+        self.lock = threading.Lock()
+        self.queue = queue.SimpleQueue()
+        self.closed = False
+
+        # repeated DEBUG lines, only touched by the writer thread
+        self.debug_limit = debug_limit
+        self.repeats = Counter()
+        self.skip_newline = False
+
+        self.writer = threading.Thread(target=self.drain, name='log-writer', daemon=True)
+        self.writer.start()
+
     def write(self, message):
-        self.terminal.write(message)
-        self.log.write(message)
-    
+        block = getattr(_local, 'block', None)
+        if block is not None:
+            block.append(message) # held back until the task finishes
+            return
+        if self.closed or not self.writer.is_alive(): # shutting down or no writer anymore, write straight through (terminal only once the file is closed)
+            self.write_streams(message)
+            return
+        self.queue.put(message)
+
+    def write_streams(self, message):
+        with self.lock:
+            self.terminal.write(message)
+            if not self.log.closed:
+                self.log.write(message)
+
+    # waits until everything queued so far is written out, gives up when the writer died or is stuck (FLUSH_TIMEOUT)
     def flush(self):
-        self.terminal.flush()
-        self.log.flush()
+        if self.closed or threading.current_thread() is self.writer:
+            self.flush_streams()
+            return
+        done = threading.Event()
+        self.queue.put(done)
+        waited = 0.0
+        while not done.wait(FLUSH_INTERVAL):
+            waited += FLUSH_INTERVAL
+            if not self.writer.is_alive() or waited >= FLUSH_TIMEOUT:
+                if not self.writer.is_alive():
+                    self.drain_left() # lines the writer never got to
+                self.flush_streams()
+                return
+
+    def flush_streams(self):
+        with self.lock:
+            self.terminal.flush()
+            if not self.log.closed:
+                self.log.flush()
+
+    # writer thread: drains the queue, flushes on request or when things go quiet
+    def drain(self):
+        while True:
+            try:
+                message = self.queue.get(timeout=FLUSH_INTERVAL)
+            except queue.Empty:
+                self.flush_streams()
+                continue
+
+            if message is _STOP:
+                break
+            if isinstance(message, threading.Event):
+                self.flush_streams()
+                message.set()
+                continue
 
-def setup_logging():
+            message = self.limit_repeats(message)
+            if message:
+                self.write_streams(message)
+
+    # writes out whatever is still queued: lines a racing print() put behind _STOP, or left behind by a dead writer
+    def drain_left(self):
+        while True:
+            try:
+                message = self.queue.get_nowait()
+            except queue.Empty:
+                return
+            if isinstance(message, threading.Event):
+                message.set()
+            elif message is not _STOP:
+                self.write_streams(message)
+
+    # drops DEBUG lines past the limit, digits are ignored so 'row 12' and 'row 13' count as the same kind
+    def limit_repeats(self, message: str) -> str:
+        if not self.debug_limit:
+            return message
+        if self.skip_newline and message == '\n': # print() sends the line ending separately
+            self.skip_newline = False
+            return ''
+        self.skip_newline = False
+        if DEBUG_PREFIX not in message:
+            return message
+
+        kept = []
+        for line in message.splitlines(keepends=True):
+            if line.startswith(DEBUG_PREFIX):
+                key = re.sub(r'\d+', '#', line.strip())[:120]
+                self.repeats[key] += 1
+                if self.repeats[key] > self.debug_limit:
+                    self.skip_newline = not line.endswith('\n')
+                    continue
+            kept.append(line)
+        return ''.join(kept)
+
+    # stops the writer and writes whatever is left, safe to call more than once
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True # from here on write() goes straight to the streams, nothing is queued behind _STOP
+        self.queue.put(_STOP)
+        self.writer.join(timeout=FLUSH_TIMEOUT)
+        self.drain_left()
+
+        suppressed = {key: count - self.debug_limit for key, count in self.repeats.items() if count > self.debug_limit}
+        for key, count in suppressed.items():
+            self.write(f'NOTE: {count} more lines like "{key}" were suppressed (LOG_DEBUG_LIMIT={self.debug_limit})\n')
+        self.flush_streams()
+        self.log.close()
+
+# buffers everything printed on this thread and writes it out in one piece at the end
+@contextmanager
+def task_block():
+    _local.block = []
+    try:
+        yield
+    finally:
+        chunks, _local.block = _local.block, None
+        sys.stdout.write(''.join(chunks))
+        sys.stdout.flush()
+
+def setup_logging(file_name: str = 'main_ingestion.log'):
     config.log_path_dir.mkdir(exist_ok=True)
-    log_file = config.log_path_dir / 'main_ingestion.log'
-    sys.stdout = Tee(log_file)
+    log_file = config.log_path_dir / file_name
+    tee = Tee(log_file, debug_limit=config.LOG_DEBUG_LIMIT)
+    sys.stdout = tee
     sys.stderr = sys.stdout
-    return log_file
\ No newline at end of file
+
+    # crashes: the traceback goes through the tee, then everything is flushed before the process dies
+    def excepthook(exc_type, exc, tb):
+        sys.stderr.write(''.join(traceback.format_exception(exc_type, exc, tb)))
+        tee.close()
+    sys.excepthook = excepthook
+
+    # crashed worker threads: the process keeps going, so the writer is only flushed, not stopped
+    def thread_excepthook(args):
+        if args.exc_type is SystemExit:
+            return
+        sys.stderr.write(f'Exception in thread {args.thread.name if args.thread else '?'}:\n')
+        sys.stderr.write(''.join(traceback.format_exception(args.exc_type, args.exc_value, args.exc_traceback)))
+        tee.flush()
+    threading.excepthook = thread_excepthook
+    atexit.register(tee.close)
+    return log_file
@@ -0,0 +1,70 @@
+'''
+POSTGRES LOADER
+---------------
+optional bulk-load backend that talks to the supabase postgres directly instead of going through postgrest.
+
+KEY NOTES:
+- COPY: the frame is written as CSV by polars and streamed with COPY into a temp staging table shaped like the target table.
+- Merge: one INSERT ... SELECT ... ON CONFLICT (pk) DO UPDATE moves the staged rows into schema.table, the whole load is one transaction (all or nothing).
+- Routing: schema, primary key and timestamp column come from TABLE_CONFIGS, same as the postgrest uploader.
+- Optional: needs psycopg (uv sync --extra postgres) and SUPABASE_DB_URL in .env, set LOAD_BACKEND=postgres to switch.
+- Testing: any postgres works, point SUPABASE_DB_URL at a local container/process with the same tables.
+
+'''
+
+import polars as pl
+import config
+
+# psycopg is only needed for this backend, so it's imported when a load actually runs
+def get_connection():
+    try:
+        import psycopg
+    except ImportError as e:
+        raise ImportError("LOAD_BACKEND=postgres needs psycopg, install it with 'uv sync --extra postgres'") from e
+
+    if not config.SUPABASE_DB_URL:
+        raise EnvironmentError('SUPABASE_DB_URL missing in .env config.')
+    # prepare_threshold=None keeps it working behind the supabase transaction pooler (no prepared statements there)
+    return psycopg.connect(config.SUPABASE_DB_URL, prepare_threshold=None)
+
+# builds the staging, COPY and merge statements for one table
+def build_statements(schema: str, table_name: str, on_conflict_id: str, columns: list[str]):
+    from psycopg import sql
+
+    target = sql.Identifier(schema, table_name)
+    staging = sql.Identifier(f'staging_{table_name}')
+    cols = sql.SQL(', ').join(map(sql.Identifier, columns))
+    updates = sql.SQL(', ').join(
+        sql.SQL('{} = EXCLUDED.{}').format(sql.Identifier(c), sql.Identifier(c)) for c in columns if c != on_conflict_id
+    )
+
+    create = sql.SQL('CREATE TEMP TABLE {} (LIKE {} INCLUDING DEFAULTS) ON COMMIT DROP').format(staging, target)
+    copy = sql.SQL('COPY {} ({}) FROM STDIN (FORMAT csv)').format(staging, cols)
+    merge = sql.SQL('INSERT INTO {} ({}) SELECT {} FROM {} ON CONFLICT ({}) DO UPDATE SET {}').format(
+        target, cols, cols, staging, sql.Identifier(on_conflict_id), updates
+    )
+    return create, copy, merge
+
+# loads a prepared frame (timestamp added, dates as ISO strings) into schema.table in one transaction
+def load_frame(df: pl.DataFrame, schema: str, table_name: str, on_conflict_id: str) -> dict:
+    create, copy, merge = build_statements(schema, table_name, on_conflict_id, df.columns)
+    batch_size = max(1, config.UPLOAD_BATCH_SIZE)
+
+    with get_connection() as conn: # commits on success, rolls back on any error
+        with conn.cursor() as cur:
+            cur.execute(create)
+            with cur.copy(copy) as stream:
+                # polars writes nulls as empty fields and '' as "", which is exactly how COPY csv tells them apart
+                for offset in range(0, df.height, batch_size):
+                    stream.write(df.slice(offset, batch_size).write_csv(include_header=False))
+            cur.execute(merge)
+            merged = cur.rowcount
+
+    return {
+        'table': f'{schema}.{table_name}',
+        'backend': 'postgres',
+        'batch_size': batch_size,
+        'batches': [],
+        'rows_uploaded': merged,
+        'resume_from': None,
+    }
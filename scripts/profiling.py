@@ -0,0 +1,112 @@
+'''
+PROFILING
+---------
+opt-in profiler for slow runs, turned on with main.py --profile or PIPELINE_PROFILE=true in .env.
+
+KEY NOTES:
+- Per Task: every run_task is wrapped in its own cProfile session, saved as logs/profiles/<run>/<task>.pstats (open with snakeviz or pstats).
+- Flamegraphs: a sampling thread records the stacks of every thread while the task runs, saved as <task>.collapsed
+  (folded stacks, works with flamegraph.pl or speedscope).
+- One At A Time: python 3.12+ only allows one active cProfile per process, so profiling runs the tasks sequentially.
+- Footer: the top hot functions (own time) of the whole run are listed in the STATISTICS footer.
+
+'''
+
+import cProfile
+import os
+import pstats
+import re
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+import config
+
+SAMPLE_INTERVAL = 0.005 # seconds between stack samples
+TOP_FUNCTIONS = 10
+
+_enabled = False
+_profile_dir = None
+_results = [] # (task name, pstats.Stats)
+
+def is_enabled() -> bool:
+    return _enabled
+
+# turns profiling on for this run, profiles go to logs/profiles/<run timestamp>/
+def enable():
+    global _enabled, _profile_dir
+    _profile_dir = config.log_path_dir / 'profiles' / datetime.now().strftime('%Y%m%d_%H%M%S')
+    _profile_dir.mkdir(parents=True, exist_ok=True)
+    _enabled = True
+    return _profile_dir
+
+# records folded stacks ('thread;file:func;file:func count') of every other thread
+class StackSampler(threading.Thread):
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        super().__init__(name='profile-sampler', daemon=True)
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == self.ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f'{os.path.basename(code.co_filename)}:{code.co_qualname}')
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+    def write(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.writelines(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+# profiles everything that runs inside the block, a no-op unless profiling is enabled
+@contextmanager
+def profile_task(name: str):
+    if not _enabled:
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    sampler = StackSampler()
+    sampler.start()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        sampler.stop()
+        slug = re.sub(r'[^a-z0-9]+', '_', name.lower()).strip('_')
+        profiler.dump_stats(_profile_dir / f'{slug}.pstats')
+        sampler.write(_profile_dir / f'{slug}.collapsed')
+        _results.append((name, pstats.Stats(profiler)))
+
+# functions with the most own time across every profiled task
+def hot_functions(limit: int = TOP_FUNCTIONS) -> list[tuple[float, int, str, str]]:
+    rows = []
+    for task, stats in _results:
+        for (file, line, func), (_, calls, own_time, _, _) in stats.stats.items():
+            where = func if file == '~' else f'{os.path.basename(file)}:{line}({func})'
+            rows.append((own_time, calls, where, task))
+    return sorted(rows, reverse=True)[:limit]
+
+# footer lines for the STATISTICS block
+def print_summary():
+    if not _enabled:
+        return
+    relative = _profile_dir.relative_to(config.log_path_dir.parent)
+    print(f"- Profiles: {str(relative).replace('\\', '/')}/ (.pstats + .collapsed per task)")
+    print(f"- Hot Functions (own time):")
+    for own_time, calls, where, task in hot_functions():
+        print(f"    {own_time:>8.3f}s {calls:>10} calls  {where}  [{task}]")
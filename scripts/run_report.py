@@ -0,0 +1,161 @@
+'''
+RUN REPORT
+----------
+per-stage timing for the whole pipeline, so we can see where a run actually spends its time.
+
+KEY NOTES:
+- Stages: import (lazily loaded modules, see timed_import()), auth, fetch, frame build, sanitize, validate, ids, account check, dedup, delta, serialize and upload (one entry per batch) are timed where they happen.
+- Metrics: every stage records seconds, rows, rows/sec and its memory growth (resident memory at the end minus at the start, linux only),
+  plus the process peak RSS so far (resource module, None on windows). the peak is a lifetime high-water mark, it is the same for every stage
+  after the biggest one, so use rss_delta_mb to see what a stage itself costs. parallel tasks share the process, their deltas overlap.
+- Context: stages are tagged with the task running on the current thread (task_context()), so parallel tasks don't get mixed up.
+- Output: main.py prints the per-stage totals in the STATISTICS footer and saves everything to logs/main_ingestion_report.json.
+
+'''
+
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource # unix only
+except ImportError:
+    resource = None
+
+# footer order, stages that never ran are left out
+STAGES = ['import', 'auth', 'fetch', 'frame build', 'sanitize', 'validate', 'ids', 'account check', 'dedup', 'delta', 'serialize', 'upload']
+
+_lock = threading.Lock()
+_local = threading.local() # name of the task running on each thread
+_stages = []
+_tasks = []
+_started_at = datetime.now()
+
+# resident memory right now, in MB (None where /proc isn't available)
+def current_rss_mb() -> float | None:
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return round(pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024), 1)
+
+# process-wide high-water mark of the resident memory since the process started, in MB
+def peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss # KB on linux, bytes on macos
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+# timestamp id of the current run, used to name per-run files (logs/rejects/)
+def run_id() -> str:
+    return _started_at.strftime('%Y%m%d_%H%M%S')
+
+def current_task() -> str | None:
+    return getattr(_local, 'task', None)
+
+# tags every stage timed on this thread with the task name
+@contextmanager
+def task_context(name: str):
+    _local.task = name
+    try:
+        yield
+    finally:
+        _local.task = None
+
+# times one stage, the yielded record can be filled in along the way (e.g. rows once they're known)
+# worker threads (upload batches, page prefetch) pass the task name explicitly
+@contextmanager
+def stage(name: str, rows: int | None = None, task: str | None = None):
+    record = {'task': task or current_task(), 'stage': name, 'rows': rows}
+    rss_before = current_rss_mb()
+    start = time.perf_counter()
+    try:
+        yield record
+    except BaseException:
+        record['failed'] = True
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        record['seconds'] = round(seconds, 4)
+        record['rows_per_sec'] = int(record['rows'] / seconds) if record['rows'] and seconds > 0 else None
+        rss_after = current_rss_mb()
+        record['rss_delta_mb'] = round(rss_after - rss_before, 1) if rss_before is not None and rss_after is not None else None
+        record['process_peak_rss_mb'] = peak_rss_mb()
+        with _lock:
+            _stages.append(record)
+
+# imports a module the first time it's needed and times it as an 'import' stage (cold start cost), later calls are free
+def timed_import(name: str):
+    if name in sys.modules:
+        return importlib.import_module(name) # cached, but still waits if another thread is halfway through importing it
+    with stage('import') as record:
+        record['module'] = name
+        return importlib.import_module(name)
+
+# clears everything recorded so far (benchmarks, repeated runs in one process)
+def reset():
+    global _started_at
+    with _lock:
+        _stages.clear()
+        _tasks.clear()
+        _started_at = datetime.now()
+
+# one line per task, filled in by main.run_task
+def add_task(name: str, table: str, status: str, rows: int | None, seconds: float):
+    with _lock:
+        _tasks.append({'task': name, 'table': table, 'status': status, 'rows': rows, 'seconds': seconds})
+
+# totals per stage across every task, seconds are summed so parallel tasks can add up to more than the wall time
+def summarize() -> list[dict]:
+    with _lock:
+        stages = list(_stages)
+
+    summary = []
+    for name in STAGES + sorted({s['stage'] for s in stages} - set(STAGES)):
+        records = [s for s in stages if s['stage'] == name]
+        if not records:
+            continue
+        seconds = sum(s['seconds'] for s in records)
+        rows = sum(s['rows'] or 0 for s in records)
+        summary.append({
+            'stage': name,
+            'calls': len(records),
+            'seconds': round(seconds, 3),
+            'rows': rows or None,
+            'rows_per_sec': int(rows / seconds) if rows and seconds > 0 else None,
+            'max_rss_delta_mb': max((s['rss_delta_mb'] for s in records if s['rss_delta_mb'] is not None), default=None), # biggest growth of one call
+            'process_peak_rss_mb': max((s['process_peak_rss_mb'] for s in records if s['process_peak_rss_mb'] is not None), default=None),
+        })
+    return summary
+
+# prints the per-stage totals, used in the STATISTICS footer
+def print_summary():
+    print(f"- Peak Memory (process high-water mark): {peak_rss_mb()} MB")
+    print(f"- Stage Timings (summed across parallel tasks, memory = biggest growth during one call):")
+    for s in summarize():
+        rows = f"{s['rows']:>10} rows {s['rows_per_sec'] or '-':>10} rows/s" if s['rows'] else ' ' * 31
+        delta = s['max_rss_delta_mb']
+        print(f"    {s['stage']:<14}{s['seconds']:>9.3f}s {rows}   mem {'-' if delta is None else f'{delta:+}'} MB")
+
+# machine readable copy of the whole run, saved next to main_ingestion.log
+def save_report(report_file, total_seconds: float):
+    with _lock:
+        stages, tasks = list(_stages), list(_tasks)
+
+    report = {
+        'started_at': _started_at.isoformat(timespec='seconds'),
+        'total_seconds': total_seconds,
+        'process_peak_rss_mb': peak_rss_mb(),
+        'tasks': tasks,
+        'summary': summarize(),
+        'stages': stages,
+    }
+    with open(report_file, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    return report_file
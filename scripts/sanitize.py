@@ -0,0 +1,97 @@
+'''
+COLUMNAR SANITIZATION
+---------------------
+vectorized replacement for the per-row sanitize_record() functions.
+the raw sheet grid is loaded straight into a polars frame and every cleanup rule runs as one expression per column.
+
+KEY NOTES:
+- Same Rules: every rule mirrors what sanitize_record() did to a single dict, just for the whole column at once.
+- Differences: M/D/YYYY dates are parsed for every source now. the old invoices_01 sanitizer never imported datetime
+  (every slash date became NULL and the row was rejected) and expenses_02 passed them through unparsed.
+  AM/PM values ('1/5/2026 1:02:03 PM', '2026-01-05 1:02:03 PM') used to be parsed for recurring fees only, the other tabs rejected them
+  (slash) or passed them through for pydantic to reject (dash). every tab parses them now.
+- Years: sheet dates need a 4-digit year like strptime did, '1/5/26' becomes NULL (and is reported) instead of the year 26.
+- Currency: '$' and ',' are stripped, empty required amounts fall back to '0' (optional ones to NULL).
+- Dates: M/D/YYYY (with or without time), AM/PM (slash or dash) and ISO strings are handled by date_parsing.py, anything unparseable becomes NULL.
+- Nulls: empty optional strings become NULL so pydantic treats them as missing.
+
+'''
+
+import polars as pl
+import date_parsing
+
+ISO_FORMAT = '%Y-%m-%dT%H:%M:%S' # what datetime.isoformat() produced before
+SHEET_FORMATS = ['%m/%d/%Y %H:%M:%S', '%m/%d/%Y', '%m/%d/%Y %I:%M:%S %p', '%Y-%m-%d %I:%M:%S %p'] # slash and AM/PM sheet dates
+FOUR_DIGIT_YEAR = r'^(\d{1,2}/\d{1,2}/\d{4}|\d{4}-\d{1,2}-\d{1,2})(\s|$)' # polars' %Y also reads '26', strptime didn't
+
+def _text(col: str) -> pl.Expr:
+    return pl.col(col).cast(pl.String).str.strip_chars()
+
+# strips '$' and ',' from amounts, empty values fall back to the default
+def currency(col: str, default: str | None = '0') -> pl.Expr:
+    val = _text(col).str.replace_all('$', '', literal=True).str.replace_all(',', '', literal=True).str.strip_chars()
+    return pl.when(val.is_null() | (val == '')).then(pl.lit(default, dtype=pl.String)).otherwise(val).alias(col)
+
+# trims whitespace but keeps empty strings, pydantic rejects those for required fields
+def required_string(col: str) -> pl.Expr:
+    return _text(col).fill_null('').alias(col)
+
+# trims whitespace and turns empty strings into NULL
+def optional_string(col: str) -> pl.Expr:
+    val = _text(col)
+    return pl.when(val == '').then(None).otherwise(val).alias(col)
+
+# parses sheet dates into ISO strings, already ISO values pass through untouched
+# returns (column, values that looked like sheet dates but couldn't be read, those become NULL)
+def sheet_date(values: pl.Series) -> tuple[pl.Series, int]:
+    frame = pl.DataFrame({'text': values}).select(pl.col('text').cast(pl.String).str.strip_chars())
+    upper = pl.col('text').str.to_uppercase()
+    frame = frame.with_columns(
+        (upper.str.contains('AM|PM') | pl.col('text').str.contains('/', literal=True)).alias('is_sheet'),
+        pl.col('text').str.contains(FOUR_DIGIT_YEAR).alias('four_digit_year'),
+    ).with_columns(
+        pl.when(pl.col('is_sheet') & pl.col('four_digit_year')).then(upper).alias('sheet_text')
+    )
+    parsed, failed = date_parsing.parse_column(frame['sheet_text'], SHEET_FORMATS)
+    failed += (frame['is_sheet'] & ~frame['four_digit_year']).sum()
+
+    column = frame.with_columns(parsed.alias('parsed')).select(
+        pl.when(pl.col('text') == '').then(None)
+        .when(pl.col('is_sheet')).then(pl.col('parsed').dt.to_string(ISO_FORMAT)) # NULL when it couldn't be read
+        .otherwise(pl.col('text'))
+        .alias(values.name)
+    )
+    return column.to_series(), failed
+
+# runs every cleanup rule over the frame, missing columns are added with the same defaults record.get() used
+def sanitize_frame(
+    df: pl.DataFrame,
+    currency_cols: list[str] = (),
+    optional_currency_cols: list[str] = (),
+    code_cols: list[str] = (),
+    date_cols: list[str] = (),
+    required_string_cols: list[str] = (),
+    optional_string_cols: list[str] = (),
+) -> pl.DataFrame:
+    defaults = {**{c: '' for c in (*optional_currency_cols, *date_cols, *required_string_cols, *optional_string_cols)},
+                **{c: '0' for c in (*currency_cols, *code_cols)}}
+    missing = [pl.lit(default, dtype=pl.String).alias(c) for c, default in defaults.items() if c not in df.columns]
+    if missing:
+        df = df.with_columns(missing)
+
+    df = df.with_columns(
+        *[currency(c) for c in currency_cols],
+        *[currency(c, default=None) for c in optional_currency_cols],
+        *[_text(c).alias(c) for c in code_cols],
+        *[required_string(c) for c in required_string_cols],
+        *[optional_string(c) for c in optional_string_cols],
+    )
+
+    # dates go through the shared parser column by column (format detection + cache), failures are reported once per column
+    dates = []
+    for c in date_cols:
+        column, failed = sheet_date(df[c])
+        dates.append(column)
+        if failed:
+            print(f'NOTE: {failed} {c} values could not be read as dates and were left empty.')
+    return df.with_columns(dates)
@@ -0,0 +1,225 @@
+'''
+SHEET SOURCE
+------------
+shared google sheets layer for the whole ingestion pipeline.
+every ingestion asks this module for its tab instead of opening its own connection.
+
+KEY NOTES:
+- Single Auth: the service account handshake and spreadsheet metadata fetch happen once per run (the login once per process for the daemon, see reset()).
+- Batch Fetch: the tabs of the sources being run (use_tabs(), every configured tab by default) are pulled in a single values_batch_get round trip on first use.
+- Raw Grid: each tab is handed back as its raw grid (header row + data rows), get_records() turns it into the same dicts get_all_records() used to return.
+- Frames: get_frame() loads the raw grid straight into an all-string polars frame for the columnar sanitization in sanitize.py.
+- Paging: iter_pages() streams a tab in fixed row ranges (A2:Z5001, A5002:Z10001, ...) with the next page prefetched, for tabs too big to hold at once (SHEET_PAGE_SIZE).
+- Snapshots: the grids are cached locally (snapshot_cache.py), an unchanged spreadsheet is not downloaded again. use_snapshots_only() replays the last snapshot offline.
+
+'''
+
+import threading
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+import gspread
+import polars as pl
+from gspread.utils import absolute_range_name, fill_gaps, numericise_all, rowcol_to_a1
+import config
+import run_report
+import snapshot_cache
+from ingestions.sources import SOURCES
+
+_lock = threading.Lock()
+_client = None # authorized gspread client, kept across daemon cycles
+_spreadsheet = None
+_available_tabs = []
+_row_counts = {} # tab name -> grid row count, bounds the paged reader
+_grids = None # tab name -> raw grid, filled by fetch_all_tabs()
+_fetched = set() # tab names already fetched (or looked for) this run
+_run_tabs = None # tab names of the sources being run (main.build_tasks), None = every spec in SOURCES
+_offline = False # True = only read the local snapshot (main.py --from-cache)
+_title = None
+
+# limits the download to the tabs of the sources being run (--only, daemon cycles where only some sources are due)
+def use_tabs(tab_names: list[str]):
+    global _run_tabs
+    _run_tabs = [tab for tab in tab_names if tab]
+
+def get_run_tabs() -> list[str]:
+    if _run_tabs is not None:
+        return _run_tabs
+    return [spec.tab_name for spec in SOURCES.values() if spec.tab_name]
+
+# switches the run to the last local snapshot, google is never contacted
+def use_snapshots_only():
+    global _offline
+    _offline = True
+
+# authenticates once and returns the shared spreadsheet handle
+def get_spreadsheet() -> gspread.Spreadsheet:
+    global _client, _spreadsheet, _available_tabs, _row_counts
+
+    with _lock:
+        if _spreadsheet is None:
+            with run_report.stage('auth'):
+                if _client is None:
+                    creds_path = config.shared_root / config.GOOGLE_SERVICE_ACCOUNT
+                    _client = gspread.service_account(filename=str(creds_path))
+                _spreadsheet = _client.open_by_key(config.GOOGLE_SHEET_ID)
+                worksheets = _spreadsheet.worksheets()
+                _available_tabs = [ws.title for ws in worksheets]
+                _row_counts = {ws.title: ws.row_count for ws in worksheets}
+        return _spreadsheet
+
+# forgets the spreadsheet metadata and grids of the last run so the next one sees the current sheet (daemon cycles)
+# the google login itself is kept, only the tab list and row counts are read again
+def reset():
+    global _spreadsheet, _grids, _title
+    with _lock:
+        _spreadsheet = None
+        _grids = None
+        _fetched.clear()
+        _title = None
+
+# drops the downloaded grids only, the next fetch downloads again (benchmarks, fakes)
+def clear_grids():
+    global _grids
+    with _lock:
+        _grids = None
+        _fetched.clear()
+
+# spreadsheet title for the process logs, read from the snapshot when offline
+def get_title() -> str:
+    if _offline:
+        fetch_all_tabs()
+        return _title
+    return get_spreadsheet().title
+
+# last modified time from drive, None when it can't be read (the sheet is then always downloaded)
+def get_modified_time(sh: gspread.Spreadsheet) -> str | None:
+    try:
+        return sh.get_lastUpdateTime()
+    except Exception as e:
+        print(f'NOTE: Could not read the sheet modified time ({e}), downloading every tab.')
+        return None
+
+# loads the last snapshot instead of the live sheet
+def load_snapshot(tabs: list[str]) -> dict[str, list[list]]:
+    global _available_tabs, _title
+
+    manifest = snapshot_cache.load_manifest(config.GOOGLE_SHEET_ID)
+    if manifest is None:
+        raise FileNotFoundError(f'No snapshot found in {snapshot_cache.get_cache_dir(config.GOOGLE_SHEET_ID)}, run once without --from-cache first')
+
+    _available_tabs, _title = manifest['available_tabs'], manifest['title']
+    tabs = [tab for tab in tabs if tab in manifest['tabs']]
+    print(f'CACHE: Replaying snapshot saved at {manifest['saved_at']} (sheet modified {manifest['modified_time']})')
+    return snapshot_cache.load_grids(config.GOOGLE_SHEET_ID, tabs)
+
+# downloads the given tabs in one round trip, unless the snapshot is still current
+def download_tabs(sh: gspread.Spreadsheet, tabs: list[str]) -> dict[str, list[list]]:
+    tabs = [tab for tab in tabs if tab in _available_tabs]
+    modified_time = get_modified_time(sh) if config.SNAPSHOT_CACHE else None
+
+    if modified_time is not None:
+        cached = snapshot_cache.load_grids(config.GOOGLE_SHEET_ID, tabs, modified_time)
+        if cached is not None:
+            print(f'CACHE: Sheet unchanged since {modified_time}, reusing the local snapshot.')
+            return cached
+
+    grids = {}
+    if tabs:
+        response = sh.values_batch_get([absolute_range_name(tab) for tab in tabs])
+        for tab, value_range in zip(tabs, response.get('valueRanges', [])):
+            grids[tab] = value_range.get('values', [])
+
+    if modified_time is not None:
+        snapshot_cache.save_grids(config.GOOGLE_SHEET_ID, sh.title, modified_time, _available_tabs, grids)
+    return grids
+
+# pulls the tabs of this run once (tab_names=None) or the given ones, tabs fetched before are reused
+def fetch_all_tabs(tab_names: list[str] | None = None) -> dict[str, list[list]]:
+    global _grids
+
+    sh = None if _offline else get_spreadsheet()
+    with _lock:
+        missing = [tab for tab in dict.fromkeys(tab_names or get_run_tabs()) if tab not in _fetched]
+        if _grids is None or missing:
+            with run_report.stage('fetch') as timing:
+                grids = (load_snapshot(missing) if _offline else download_tabs(sh, missing)) if missing else {}
+                _grids = {**(_grids or {}), **grids}
+                _fetched.update(missing)
+                timing['rows'] = sum(max(len(grid) - 1, 0) for grid in grids.values())
+        return _grids
+
+# returns the raw grid of a single tab (first row is the header), tabs outside the run are fetched on their own
+def get_grid(tab_name: str) -> list[list]:
+    grids = fetch_all_tabs()
+    if tab_name not in grids:
+        grids = fetch_all_tabs([tab_name])
+    if tab_name not in grids:
+        raise ValueError(f'Tab Name: {tab_name} not found, available: {_available_tabs}')
+    return grids[tab_name]
+
+# turns a raw grid into row dicts, mirrors worksheet.get_all_records()
+def get_records(tab_name: str) -> list[dict]:
+    grid = get_grid(tab_name)
+    if len(grid) < 2:
+        return []
+
+    headers = grid[0]
+    rows = fill_gaps(grid[1:], cols=len(headers))
+    return [dict(zip(headers, numericise_all(row))) for row in rows]
+
+# loads header + data rows into an all-string polars frame, one column per header
+def grid_to_frame(tab_name: str, header: list, rows: list[list]) -> pl.DataFrame:
+    # unnamed columns are dropped, same as pydantic ignoring the '' key before
+    headers = [str(h).strip() or f'__unnamed_{i}' for i, h in enumerate(header)]
+    named = [h for h in headers if not h.startswith('__unnamed_')]
+    if len(set(named)) != len(named):
+        raise ValueError(f'Tab Name: {tab_name} has duplicate headers: {sorted({h for h in named if named.count(h) > 1})}')
+
+    with run_report.stage('frame build', rows=len(rows)):
+        rows = [row[:len(headers)] for row in fill_gaps(rows, cols=len(headers))]
+        df = pl.DataFrame(rows, schema={h: pl.String for h in headers}, orient='row')
+        return df.select(named)
+
+# loads a raw grid straight into an all-string polars frame
+def get_frame(tab_name: str) -> pl.DataFrame:
+    grid = get_grid(tab_name)
+    if len(grid) < 2:
+        return pl.DataFrame()
+    return grid_to_frame(tab_name, grid[0], grid[1:])
+
+# streams a tab as (first sheet row, frame) pages of page_size rows, the next page downloads while the current one is processed
+def iter_pages(tab_name: str, page_size: int) -> Iterator[tuple[int, pl.DataFrame]]:
+    if _offline: # the snapshot is already local, just slice it
+        grid = get_grid(tab_name)
+        for i in range(1, len(grid), page_size):
+            yield i + 1, grid_to_frame(tab_name, grid[0], grid[i:i + page_size])
+        return
+
+    sh = get_spreadsheet()
+    if tab_name not in _available_tabs:
+        raise ValueError(f'Tab Name: {tab_name} not found, available: {_available_tabs}')
+
+    header = (sh.values_get(absolute_range_name(tab_name, '1:1')).get('values') or [[]])[0]
+    if not header:
+        return
+    last_col = rowcol_to_a1(1, len(header))[:-1] # 'Z1' -> 'Z'
+    row_count = _row_counts[tab_name]
+
+    # blank rows inside a range come back as [], so row numbers stay exact within a page
+    task = run_report.current_task() # the prefetch thread reports its timings under this task
+    def fetch(start: int) -> list[list]:
+        with run_report.stage('fetch', task=task) as timing:
+            rows = sh.values_get(absolute_range_name(tab_name, f'A{start}:{last_col}{start + page_size - 1}')).get('values', [])
+            timing['rows'] = len(rows)
+        return rows
+
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix='prefetch') as prefetch:
+        start = 2
+        pending = prefetch.submit(fetch, start) if start <= row_count else None
+        while pending is not None:
+            rows = pending.result()
+            next_start = start + page_size
+            pending = prefetch.submit(fetch, next_start) if next_start <= row_count else None
+            if rows:
+                yield start, grid_to_frame(tab_name, header, rows)
+            start = next_start
@@ -0,0 +1,73 @@
+'''
+SNAPSHOT CACHE
+--------------
+local copy of the raw google sheets grids, so unchanged sheets don't get downloaded again.
+
+KEY NOTES:
+- Key: snapshots live under cache/<spreadsheet id>/ and are tagged with the spreadsheet's last modified time (drive metadata).
+- Conditional Refetch: sheet_source.py compares the modified time first and only runs the values_batch_get when the sheet changed.
+- Raw Grids: every tab is stored as parquet with one list[str] row per sheet row, so the grid comes back exactly as the API returned it.
+- Offline Replay: main.py --from-cache replays validation + upload from the last snapshot without touching google at all (reruns after a supabase outage).
+- Disable with SNAPSHOT_CACHE=false in .env.
+
+'''
+
+import json
+import re
+from datetime import datetime
+import polars as pl
+import config
+
+MANIFEST = 'manifest.json'
+
+def get_cache_dir(sheet_id: str):
+    return config.cache_path_dir / sheet_id
+
+# tab names can hold spaces and slashes, the manifest keeps the real name -> file mapping
+def get_tab_file_name(tab_name: str) -> str:
+    return f"{re.sub(r'[^A-Za-z0-9_-]+', '_', tab_name)}.parquet"
+
+# reads the manifest of the last snapshot, None when there is none
+def load_manifest(sheet_id: str) -> dict | None:
+    manifest_file = get_cache_dir(sheet_id) / MANIFEST
+    if not manifest_file.exists():
+        return None
+    with open(manifest_file, encoding='utf-8') as f:
+        return json.load(f)
+
+# loads the cached grids, only when the snapshot covers every tab and matches the sheet's modified time (None = any snapshot)
+def load_grids(sheet_id: str, tabs: list[str], modified_time: str | None = None) -> dict[str, list[list]] | None:
+    manifest = load_manifest(sheet_id)
+    if manifest is None or any(tab not in manifest['tabs'] for tab in tabs):
+        return None
+    if modified_time is not None and manifest['modified_time'] != modified_time:
+        return None
+
+    cache_dir = get_cache_dir(sheet_id)
+    return {tab: pl.read_parquet(cache_dir / manifest['tabs'][tab])['row'].to_list() for tab in tabs}
+
+# saves the freshly fetched grids, the manifest goes last so a half written snapshot is never picked up
+# tabs saved earlier for the same modified time are kept, runs that fetch only some tabs (--only, daemon) add up to one snapshot
+def save_grids(sheet_id: str, title: str, modified_time: str, available_tabs: list[str], grids: dict[str, list[list]]):
+    cache_dir = get_cache_dir(sheet_id)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    previous = load_manifest(sheet_id)
+    manifest_file = cache_dir / MANIFEST
+    manifest_file.unlink(missing_ok=True)
+
+    tabs = dict(previous['tabs']) if previous and previous['modified_time'] == modified_time else {}
+    for tab, grid in grids.items():
+        file_name = get_tab_file_name(tab)
+        rows = [[str(value) for value in row] for row in grid]
+        pl.DataFrame({'row': rows}, schema={'row': pl.List(pl.String)}).write_parquet(cache_dir / file_name)
+        tabs[tab] = file_name
+
+    manifest = {
+        'title': title,
+        'modified_time': modified_time,
+        'saved_at': datetime.now().isoformat(timespec='seconds'),
+        'available_tabs': available_tabs,
+        'tabs': tabs,
+    }
+    with open(manifest_file, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
@@ -1,74 +1,217 @@
 '''
 SUPABASE LOADER
 ---------------
-Universal uploader script for the entire ingestion pipeline. 
+Universal uploader script for the entire ingestion pipeline.
 No matter which sheet the data comes from, it passes through here to enter the cloud.
 
 KEY NOTES:
-- Dynamic Routing: Automatically assigns the correct database schema (accounting vs. expenses) based on the table name.
+- Dynamic Routing: Automatically assigns the correct database schema (accounting vs. expenses) based on the table name, as declared in ingestions/sources.py.
 - Upsert Logic: Uses 'on_conflict' IDs to prevent duplicate rows, it updates existing records and inserts new ones.
 - Timestamping: Injects a 'record_updated_at' column in PST so we can track exactly when the data was synced, regardless of when it was created.
+- Batching: Rows are sent in batches of UPLOAD_BATCH_SIZE, with at most UPLOAD_MAX_IN_FLIGHT batches in flight per table.
+- Retries: Transient errors (timeouts, dropped connections, 429/5xx) are retried with exponential backoff, one bad batch doesn't sink the rest.
+- Resuming: Every upload returns a per-batch report, a partial failure can be resumed with upload_to_supabase(df, table, start_batch=report['resume_from']).
+- Postgres Backend: LOAD_BACKEND=postgres skips postgrest and bulk-loads with COPY + one ON CONFLICT merge (postgres_loader.py).
+- Serialization: each batch goes from the polars (arrow) buffers straight into a JSON body with write_json(), rows never become python dicts.
+- Shared Client: One client per schema is created for the whole run and reused by every task, backed by a kept-alive connection pool (SUPABASE_POOL_SIZE).
 
 '''
 
-from supabase import create_client, Client
+from supabase import create_client, Client, ClientOptions
+from postgrest.exceptions import APIError
+from concurrent.futures import ThreadPoolExecutor
+import threading
 import config
+import run_report
+from ingestions.sources import SOURCES
 import polars as pl
 import datetime
+import io
+import random
+import time
+import httpx
 import pytz
 
-# Table Name: (Schema, Primary Key, Timestamp Column)
-TABLE_CONFIGS = {
-    'chart_of_accounts': ('accounting', 'account_code', 'account_updated_at'),
-    'latest_expenses_01': ('expenses', 'expense_transaction_id', 'expense_record_updated_at'),
-    'latest_expenses_02': ('expenses', 'expense_transaction_id', 'expense_record_updated_at'),
-    'latest_invoices_01': ('expenses', 'invoice_transaction_id', 'invoice_record_updated_at'),
-    'latest_recurring_fees_01': ('expenses', 'recurring_fee_transaction_id', 'recurring_fee_record_updated_at'),
-}
+# Table Name: (Schema, Primary Key, Timestamp Column), built from the source specs
+TABLE_CONFIGS = {spec.table: (spec.schema, spec.primary_key, spec.timestamp_col) for spec in SOURCES.values()}
 
 PST = pytz.timezone('America/Los_Angeles')
 
-def upload_to_supabase(df: pl.DataFrame, table_name: str):
+# http statuses and postgres error codes that are worth another try
+TRANSIENT_CODES = {
+    '408', '425', '429', '500', '502', '503', '504', # http
+    '40001', '40P01', '53300', '57014', '08000', '08003', '08006', # serialization failure, deadlock, too many connections, statement timeout, connection errors
+}
+
+_clients_lock = threading.Lock()
+_clients = {} # schema -> (Client, httpx.Client), shared by the whole run
+
+class PartialUploadError(RuntimeError):
+    def __init__(self, message: str, report: dict):
+        super().__init__(message)
+        self.report = report
+
+# returns the process-wide client for a schema, created on first use
+# each schema gets its own client because postgrest keeps the schema in the session headers,
+# so sharing one across schemas would race when uploads run concurrently
+def get_supabase_client(schema: str) -> Client:
+    with _clients_lock:
+        if schema not in _clients:
+            url, key = config.SUPABASE_URL, config.SUPABASE_KEY
+            if not url or not key:
+                raise EnvironmentError("Supabase credentials missing in .env config.")
+
+            http_client = httpx.Client(
+                timeout=config.SUPABASE_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=config.SUPABASE_POOL_SIZE,
+                    max_keepalive_connections=config.SUPABASE_POOL_SIZE,
+                    keepalive_expiry=60,
+                ),
+            )
+            options = ClientOptions(schema=schema, httpx_client=http_client, postgrest_client_timeout=config.SUPABASE_TIMEOUT)
+            supabase = create_client(url, key, options=options)
+            supabase.postgrest # builds the rest client now, not lazily from several threads at once
+            _clients[schema] = (supabase, http_client)
+        return _clients[schema][0]
+
+# closes the pooled connections, called once at the end of the run
+def close_supabase_clients():
+    with _clients_lock:
+        for _, http_client in _clients.values():
+            http_client.close()
+        _clients.clear()
+
+# decides if an error is worth retrying or should fail the batch straight away
+def is_transient_error(e: Exception) -> bool:
+    if isinstance(e, (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError)):
+        return True
+    if isinstance(e, httpx.HTTPStatusError):
+        return str(e.response.status_code) in TRANSIENT_CODES
+    return str(getattr(e, 'code', '')) in TRANSIENT_CODES
+
+# serializes one batch straight from the arrow buffers into a JSON array body, no python dict per row
+def serialize_batch(df: pl.DataFrame) -> bytes:
+    buffer = io.BytesIO()
+    df.write_json(buffer) # row oriented: [{"col": value, ...}, ...], nulls written as null
+    return buffer.getvalue()
+
+# posts a pre-serialized body to postgrest, the same request supabase-py's upsert() builds minus the json encoding
+def post_upsert(supabase: Client, table_name: str, on_conflict_id: str, body: bytes):
+    rest = supabase.postgrest # already bound to the schema (Content-Profile header)
+    headers = rest.headers.copy()
+    headers['Prefer'] = 'return=minimal,resolution=merge-duplicates'
+    headers['Content-Type'] = 'application/json'
+    response = rest.session.post(str(rest.base_url.joinpath(table_name)), content=body, params={'on_conflict': on_conflict_id}, headers=headers)
+
+    if response.is_success:
+        return
+    if str(response.status_code) in TRANSIENT_CODES:
+        response.raise_for_status() # retried on the http status
+    try:
+        details = response.json()
+    except ValueError:
+        response.raise_for_status()
+    raise APIError(details if isinstance(details, dict) else {'message': str(details)})
+
+# sends one batch, retrying transient errors with exponential backoff (+ jitter)
+def upsert_batch(supabase: Client, table_name: str, on_conflict_id: str, body: bytes):
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            post_upsert(supabase, table_name, on_conflict_id, body)
+            return attempt
+        except Exception as e:
+            if attempt > config.UPLOAD_MAX_RETRIES or not is_transient_error(e):
+                e.attempts = attempt
+                raise
+            delay = config.UPLOAD_RETRY_BASE_DELAY * (2 ** (attempt - 1))
+            time.sleep(delay + random.uniform(0, delay / 2))
 
-    # checking if df is empty before doing anything 
+# typed frames carry real dates, the API wants them as ISO strings (sync_state.py hashes this form too)
+def to_iso_dates(df: pl.DataFrame) -> pl.DataFrame:
+    return df.with_columns(
+        pl.col(pl.Datetime).dt.to_string('%Y-%m-%dT%H:%M:%S%.f'),
+        pl.col(pl.Date).dt.to_string('%Y-%m-%d'),
+    )
+
+def upload_to_supabase(df: pl.DataFrame, table_name: str, start_batch: int = 0):
+
+    # checking if df is empty before doing anything
     if df.is_empty():
         print(f'No data available for {table_name}, please verify and try again...')
         return
 
-    # resolve config 
+    # resolve config
     schema, on_conflict_id, timestamp_col = TABLE_CONFIGS.get(
             table_name, ('public', 'id', 'updated_at')
         )
-    
-    # capture current execution time for timestamping 
+
+    # capture current execution time for timestamping
     now = datetime.datetime.now(PST)
     pst_now_str = now.strftime('%b %d, %Y at %I:%M %p')
 
     df = df.with_columns(pl.lit(now.isoformat()).alias(timestamp_col)) # adds the timestamp column to the dataframe
 
-    # initializing the client
-    url, key = config.SUPABASE_URL, config.SUPABASE_KEY
-    if not url or not key:
-        raise EnvironmentError("Supabase credentials missing in .env config.")
-    
-    supabase: Client = create_client(url, key)
-    
-    # execute upsert to supabase
-    records = df.fill_null(pl.lit(None)).to_dicts() #ensures database compatibility for empty cells
-    print(f'{len(records)} rows available. Uploading to {schema}.{table_name}')
-
-    try: 
-        response = (
-            supabase.schema(schema)
-            .table(table_name)
-            .upsert(records, on_conflict=on_conflict_id)
-            .execute()
-        )
-        print(f"SUCCESS: Uploaded to Supabase at {pst_now_str} PST.")
-        return response
+    df = to_iso_dates(df)
+
+    # optional direct postgres backend (COPY + one merge), the whole table goes in one transaction
+    if config.LOAD_BACKEND == 'postgres':
+        import postgres_loader # psycopg is only imported when this backend is on
+        print(f'{df.height} rows available. Loading into {schema}.{table_name} via COPY')
+        with run_report.stage('upload', rows=df.height):
+            report = postgres_loader.load_frame(df, schema, table_name, on_conflict_id)
+        print(f"SUCCESS: Loaded {report['rows_uploaded']} rows into Postgres at {pst_now_str} PST.")
+        return report
+
+    # reusing the run-wide client for this schema
+    supabase: Client = get_supabase_client(schema)
 
-    except Exception as e:
-        print(f"FAILURE: Supabase upload failed for {table_name}.")
-        print(f"DEBUG: {str(e)}")
-        raise
+    # split the frame into batches, earlier batches are skipped when resuming
+    batch_size = max(1, config.UPLOAD_BATCH_SIZE)
+    batches = [
+        {'batch': i, 'start_row': offset, 'rows': min(batch_size, df.height - offset), 'status': 'skipped', 'attempts': 0, 'error': None}
+        for i, offset in enumerate(range(0, df.height, batch_size))
+    ]
+    pending = [b for b in batches if b['batch'] >= start_batch]
+    print(f'{sum(b['rows'] for b in pending)} rows available. Uploading to {schema}.{table_name} in {len(pending)} batch(es)')
+
+    task = run_report.current_task() # batches run on worker threads, their timings still belong to this task
+
+    def send(batch: dict):
+        with run_report.stage('serialize', rows=batch['rows'], task=task):
+            body = serialize_batch(df.slice(batch['start_row'], batch['rows'])) # empty cells go out as JSON null
+        try:
+            with run_report.stage('upload', rows=batch['rows'], task=task) as timing:
+                timing['batch'] = batch['batch']
+                batch['attempts'] = upsert_batch(supabase, table_name, on_conflict_id, body)
+            batch['status'] = 'success'
+        except Exception as e:
+            batch['attempts'] = getattr(e, 'attempts', 1)
+            batch['status'] = 'failed'
+            batch['error'] = str(e)
+
+    # execute batched upserts to supabase, bounded number in flight
+    with ThreadPoolExecutor(max_workers=max(1, config.UPLOAD_MAX_IN_FLIGHT)) as executor:
+        list(executor.map(send, pending))
+
+    failed = [b for b in batches if b['status'] == 'failed']
+    report = {
+        'table': f'{schema}.{table_name}',
+        'batch_size': batch_size,
+        'batches': batches,
+        'rows_uploaded': sum(b['rows'] for b in batches if b['status'] == 'success'),
+        'resume_from': failed[0]['batch'] if failed else None,
+    }
+
+    if failed:
+        print(f"FAILURE: Supabase upload failed for {table_name}, {len(failed)}/{len(pending)} batch(es) failed.")
+        for b in failed:
+            print(f"DEBUG: Batch {b['batch']} (rows {b['start_row']}-{b['start_row'] + b['rows'] - 1}) after {b['attempts']} attempt(s): {b['error']}")
+        raise PartialUploadError(
+            f"{len(failed)} batch(es) failed for {table_name}, resume from batch {report['resume_from']}", report
+        )
 
+    print(f"SUCCESS: Uploaded to Supabase at {pst_now_str} PST.")
+    return report
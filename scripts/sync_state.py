@@ -0,0 +1,72 @@
+'''
+SYNC STATE
+----------
+change detection stage that sits between validation and the Supabase upload.
+instead of re-sending every valid row on every run, only rows that are new or changed since the last sync are uploaded.
+
+KEY NOTES:
+- Row Hashes: every validated row is hashed and stored under its primary key (from TABLE_CONFIGS).
+  rows are hashed as they are sent (dates as ISO strings), so switching VALIDATION_MODE (typed or string dates) doesn't re-upload the table.
+- Delta Upload: rows whose key + hash match the last synced state are skipped, keys that disappeared from the sheet are reported (not deleted).
+- Pages: detect_changes() works page by page for the streaming reader, report_changes() prints the totals once the whole tab went through.
+- State Files: state/<table_name>.parquet keeps the last synced hashes, it is only saved after a fully successful upload.
+- Full Sync: DELTA_SYNC=false in .env sends everything like before. the state is also ignored after a polars upgrade since row hashes are only stable within one polars version.
+
+'''
+
+import polars as pl
+import config
+from supabase_upload import TABLE_CONFIGS, to_iso_dates
+
+HASH_SEED = 0 # fixed seed so the same row hashes the same way on every run
+
+def get_state_file(table_name: str):
+    return config.state_path_dir / f'{table_name}.parquet'
+
+# hashes every row under its primary key, columns are sorted so column order doesn't matter
+def hash_rows(df: pl.DataFrame, table_name: str) -> pl.DataFrame:
+    pk = TABLE_CONFIGS[table_name][1]
+    return pl.DataFrame({
+        'pk': df.get_column(pk).cast(pl.String),
+        'hash': to_iso_dates(df).select(sorted(df.columns)).hash_rows(seed=HASH_SEED),
+    })
+
+# loads the hashes saved by the last successful sync, None means "send everything"
+def load_state(table_name: str) -> pl.DataFrame | None:
+    state_file = get_state_file(table_name)
+    if not config.DELTA_SYNC or not state_file.exists():
+        return None
+
+    state = pl.read_parquet(state_file)
+    if state.is_empty() or state['polars_version'][0] != pl.__version__:
+        return None
+    return state.select('pk', 'hash')
+
+# saves the current hashes once the upload went through
+def save_state(table_name: str, hashes: pl.DataFrame):
+    config.state_path_dir.mkdir(exist_ok=True)
+    hashes.with_columns(pl.lit(pl.__version__).alias('polars_version')).write_parquet(get_state_file(table_name))
+
+# splits a validated frame (or one page of it) into the rows that need uploading, plus its row hashes
+def detect_changes(df: pl.DataFrame, table_name: str, previous: pl.DataFrame | None) -> tuple[pl.DataFrame, pl.DataFrame]:
+    hashes = hash_rows(df, table_name)
+    if previous is None:
+        return df, hashes
+
+    synced = previous.select(pl.format('{}:{}', 'pk', 'hash')).to_series()
+    current = hashes.select(pl.format('{}:{}', 'pk', 'hash')).to_series()
+    return df.filter(~current.is_in(synced.implode())), hashes
+
+# prints the delta summary once every row went through detect_changes, returns the keys deleted since last sync
+def report_changes(table_name: str, previous: pl.DataFrame | None, hashes: pl.DataFrame, changed_rows: int) -> list[str]:
+    if previous is None:
+        print(f'DELTA: No previous sync state for {table_name}, uploaded all {hashes.height} rows.')
+        return []
+
+    deleted = previous.filter(~pl.col('pk').is_in(hashes['pk'].implode()))['pk'].to_list()
+    print(f'DELTA: {changed_rows} new/changed, {hashes.height - changed_rows} unchanged, {len(deleted)} deleted since last sync.')
+    if deleted:
+        preview = ', '.join(deleted[:10]) + (' ...' if len(deleted) > 10 else '')
+        print(f'NOTE: Keys no longer in the sheet (still in {table_name}): {preview}')
+
+    return deleted
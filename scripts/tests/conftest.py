@@ -0,0 +1,34 @@
+'''
+TEST FIXTURES
+-------------
+the tests run the real pipeline code offline, on the same google sheets + supabase fakes as the benchmarks (benchmarks/fakes.py).
+
+KEY NOTES:
+- Tabs: tab names default to COA, EXP1, EXP2, INV1 and RCR1 when there is no .env, real .env values win.
+- Isolation: logs, state and snapshot cache go to a temp folder per test, nothing touches the project folders.
+- Run from the project root: python -m pytest
+
+'''
+
+import os
+
+for name, tab in {'COA_TAB_NAME': 'COA', 'EXPENSES01_TAB_NAME': 'EXP1', 'EXPENSES02_TAB_NAME': 'EXP2',
+                  'INVOICES01_TAB_NAME': 'INV1', 'RECURRING01_TAB_NAME': 'RCR1'}.items():
+    os.environ.setdefault(name, tab)
+
+import pytest
+import config
+import run_report
+import sheet_source
+
+@pytest.fixture(autouse=True)
+def pipeline_env(tmp_path, monkeypatch):
+    for name in ('log_path_dir', 'state_path_dir', 'cache_path_dir'):
+        path = tmp_path / name.removesuffix('_path_dir')
+        path.mkdir()
+        monkeypatch.setattr(config, name, path)
+    monkeypatch.setattr(config, 'SNAPSHOT_CACHE', False)
+    monkeypatch.setattr(sheet_source, '_run_tabs', None) # main.build_tasks narrows the tabs per run
+    run_report.reset()
+    yield tmp_path
+    sheet_source.reset()
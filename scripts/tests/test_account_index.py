@@ -0,0 +1,98 @@
+import time
+import polars as pl
+import pytest
+import account_index
+import config
+import main
+import supabase_upload
+import sync_state
+from benchmarks.fakes import install_fake_sheet, install_fake_supabase
+from benchmarks.synthetic import make_grid
+from ingestions import engine
+from ingestions.sources import SOURCES
+
+COA, EXP1 = SOURCES['chart_of_accounts'], SOURCES['expenses_01']
+
+# chart of accounts 1000 (ok), 1001 (account_dup_code) and 1002, expenses use 1000, 1001 and the unknown 4242
+def install_sheet():
+    coa = make_grid(COA.model, 3, dirty=0, unique_col='account_code')
+    dup_col = coa[0].index('account_dup_code')
+    for row, dup in zip(coa[1:], ['FALSE', 'TRUE', 'FALSE']):
+        row[dup_col] = dup
+    expenses = make_grid(EXP1.model, 3, dirty=0)
+    code_col = expenses[0].index('account_code')
+    for row, code in zip(expenses[1:], ['1000', '1001', '4242']):
+        row[code_col] = code
+    install_fake_sheet({COA.tab_name: coa, EXP1.tab_name: expenses})
+
+def read_report(spec) -> pl.DataFrame:
+    return pl.read_parquet(next((config.log_path_dir / account_index.REPORT_DIR / spec.key).glob('*.parquet')))
+
+# chart of accounts listed last on one worker (--profile): expenses must not wait on it while it's queued behind
+def test_reversed_only_on_one_worker_does_not_stall(monkeypatch):
+    monkeypatch.setattr(account_index, 'WAIT_TIMEOUT', 5)
+    monkeypatch.setattr(config, 'ACCOUNT_CHECK_MODE', 'reject')
+    install_sheet()
+    install_fake_supabase({COA.schema, EXP1.schema})
+
+    start = time.perf_counter()
+    try:
+        results = main.run_tasks(main.build_tasks(['expenses_01', 'chart_of_accounts']), max_workers=1)
+    finally:
+        supabase_upload.close_supabase_clients()
+    assert time.perf_counter() - start < account_index.WAIT_TIMEOUT
+    assert results == [3, 1] # chart of accounts first, expenses without the two bad codes
+
+    report = read_report(EXP1).sort('account_code')
+    assert report.select('account_code', 'error_code').rows() == [(1001, 'duplicate_account_code'), (4242, 'unknown_account_code')]
+    assert account_index.get_cache_file().exists()
+
+# a run without the chart of accounts checks against the index cached by the last one
+def test_cached_index_when_chart_of_accounts_is_not_run(monkeypatch):
+    monkeypatch.setattr(config, 'ACCOUNT_CHECK_MODE', 'flag')
+    install_sheet()
+    pl.DataFrame({'account_code': [1000, 1001], 'account_dup_code': [False, True]}).write_parquet(account_index.get_cache_file())
+
+    account_index.begin_run([EXP1.key])
+    account_index.begin_source(EXP1)
+    df = pl.DataFrame({EXP1.primary_key: ['A', 'B', 'C'], 'account_code': [1000, 1001, 4242]})
+    assert account_index.apply(EXP1, df).height == 3 # flag mode keeps every row
+    account_index.finish(EXP1)
+    assert read_report(EXP1)['row_id'].to_list() == ['B', 'C']
+
+# a chart of accounts task failing before, between or after its pages releases the other sources right away,
+# and the pages it did validate are not published as the index (no partial index, no cache written)
+@pytest.mark.parametrize('failure', ['divider', 'load_state', 'upload'])
+def test_failed_chart_of_accounts_releases_waiters(monkeypatch, failure):
+    monkeypatch.setattr(account_index, 'WAIT_TIMEOUT', 5)
+    monkeypatch.setattr(config, 'ACCOUNT_CHECK_MODE', 'reject')
+    monkeypatch.setattr(config, 'SHEET_PAGE_SIZE', 2)
+    install_sheet()
+    install_fake_supabase({COA.schema, EXP1.schema})
+
+    def fail(*args):
+        raise RuntimeError(f'{failure} failed')
+    if failure == 'divider':
+        divider = engine.print_divider
+        monkeypatch.setattr(engine, 'print_divider', lambda title: fail() if title == COA.title else divider(title))
+    elif failure == 'load_state':
+        load_state = sync_state.load_state
+        monkeypatch.setattr(sync_state, 'load_state', lambda table: fail() if table == COA.table else load_state(table))
+    else:
+        upload, uploads = supabase_upload.upload_to_supabase, []
+        def upload_first_page(df, table):
+            if table == COA.table:
+                uploads.append(df.height)
+                if len(uploads) > 1:
+                    fail()
+            upload(df, table)
+        monkeypatch.setattr(supabase_upload, 'upload_to_supabase', upload_first_page)
+
+    start = time.perf_counter()
+    try:
+        results = main.run_tasks(main.build_tasks(['chart_of_accounts', 'expenses_01']), max_workers=2)
+    finally:
+        supabase_upload.close_supabase_clients()
+    assert time.perf_counter() - start < account_index.WAIT_TIMEOUT
+    assert results == [None, 3] # no index to check against, every expense goes up
+    assert not account_index.get_cache_file().exists()
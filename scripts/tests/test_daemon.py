@@ -0,0 +1,16 @@
+import daemon
+
+# an error outside run_task (google login, snapshot cache, task setup) must not stop the service
+def test_failed_cycle_is_logged_and_rescheduled(monkeypatch, capsys):
+    def broken_build_tasks(keys):
+        raise PermissionError('google login failed')
+    monkeypatch.setattr(daemon, 'build_tasks', broken_build_tasks)
+    scheduler = daemon.Scheduler({'expenses_01': 300, 'invoices_01': 600})
+
+    scheduler.run_cycle(scheduler.due())
+
+    assert 'google login failed' in capsys.readouterr().out
+    status = scheduler.status()['sources']
+    assert [status[key]['status'] for key in ('expenses_01', 'invoices_01')] == ['error', 'error']
+    assert status['expenses_01']['next_run_in_seconds'] > 0
+    assert scheduler.due() == []
@@ -0,0 +1,44 @@
+from datetime import datetime
+import polars as pl
+import pytest
+import config
+import date_parsing
+
+FORMATS = ['%m/%d/%Y %H:%M:%S', '%m/%d/%Y', '%m/%d/%Y %I:%M:%S %p']
+VALUES = ['1/5/2026 13:02:03', '1/5/2026', '12/31/2025', '1/5/2026 1:02:03 PM', 'not a date', None, '1/5/2026']
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    date_parsing.clear_cache()
+    yield
+    date_parsing.clear_cache()
+
+# every value is read by the format that fits it, like the strptime loop did, failures are counted (NULLs aren't)
+@pytest.mark.parametrize('cache_size', [0, 2, 50_000], ids=['no cache', 'too small', 'cached'])
+def test_mixed_formats_match_strptime(monkeypatch, cache_size):
+    monkeypatch.setattr(config, 'DATE_CACHE_SIZE', cache_size)
+    parsed, failed = date_parsing.parse_column(pl.Series('day', VALUES), FORMATS)
+
+    def strptime(value):
+        for fmt in FORMATS:
+            try:
+                return datetime.strptime(value, fmt)
+            except (TypeError, ValueError):
+                pass
+        return None
+    assert parsed.to_list() == [strptime(value) for value in VALUES]
+    assert failed == 1 and parsed.name == 'day'
+
+# the format reading most of the sample goes first, ties keep their order
+def test_best_format_is_tried_first():
+    text = pl.Series(['1/5/2026', '2/5/2026', '1/5/2026 10:00:00'])
+    assert date_parsing.detect_formats(text, FORMATS) == ['%m/%d/%Y', '%m/%d/%Y %H:%M:%S', '%m/%d/%Y %I:%M:%S %p']
+
+# the cache keeps the most recently used values and never grows past DATE_CACHE_SIZE
+def test_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(config, 'DATE_CACHE_SIZE', 3)
+    for value in ['1/1/2026', '1/2/2026', '1/3/2026', '1/1/2026', '1/4/2026']:
+        date_parsing.parse_column(pl.Series([value]), FORMATS)
+
+    [cache] = date_parsing._caches.values()
+    assert list(cache) == ['1/3/2026', '1/1/2026', '1/4/2026'] # 1/2 was the least recently used
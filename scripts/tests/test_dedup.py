@@ -0,0 +1,42 @@
+import polars as pl
+import pytest
+import config
+import dedup
+from benchmarks.fakes import install_fake_sheet
+from benchmarks.synthetic import make_grid
+from ingestions.engine import get_validated_data
+from ingestions.sources import SOURCES
+
+EXP1, EXP2 = SOURCES['expenses_01'], SOURCES['expenses_02']
+
+def read_report(spec) -> pl.DataFrame:
+    files = list((config.log_path_dir / dedup.DUPLICATES_DIR / spec.key).glob('*.parquet'))
+    return pl.read_parquet(files[0]) if files else pl.DataFrame(schema=dedup.REPORT_SCHEMA)
+
+# every engine hands dedup its own dtypes (typeadapter keeps dates as pl.Date), the business key has to work for all of them
+@pytest.mark.parametrize('mode', ['pydantic', 'typeadapter', 'columnar'])
+def test_duplicates_within_and_across_tabs(monkeypatch, mode):
+    monkeypatch.setattr(config, 'VALIDATION_MODE', mode)
+    monkeypatch.setattr(config, 'DEDUP_MODE', 'drop')
+    monkeypatch.setattr(config, 'ACCOUNT_CHECK_MODE', 'off')
+    grid = make_grid(EXP1.model, 30, dirty=0)
+    install_fake_sheet({EXP1.tab_name: grid + [grid[1]], EXP2.tab_name: [grid[0], grid[2], grid[3]]})
+
+    dedup.begin_run([EXP1.key, EXP2.key])
+    unique_rows = get_validated_data(EXP1).height
+    assert get_validated_data(EXP2).is_empty() # both rows already exist in expenses 01
+
+    own = read_report(EXP1)
+    assert own.height == 31 - unique_rows and own.height >= 1 # 30 rows + the repeated one
+    assert own['duplicate_of_source'].unique().to_list() == [EXP1.key]
+    assert read_report(EXP2)['duplicate_of_source'].to_list() == [EXP1.key, EXP1.key]
+
+def test_flag_mode_keeps_rows(monkeypatch):
+    monkeypatch.setattr(config, 'VALIDATION_MODE', 'typeadapter')
+    monkeypatch.setattr(config, 'DEDUP_MODE', 'flag')
+    grid = make_grid(EXP1.model, 10, dirty=0)
+    install_fake_sheet({EXP1.tab_name: grid + [grid[1]]})
+
+    dedup.begin_run([EXP1.key])
+    assert get_validated_data(EXP1).height == 11
+    assert read_report(EXP1).height >= 1
@@ -0,0 +1,134 @@
+import dataclasses
+import polars as pl
+import pytest
+import config
+import dedup
+from benchmarks.fakes import install_fake_sheet
+from benchmarks.synthetic import make_grid
+from ingestions.engine import get_validated_data, iter_validated_pages, validate_in_process
+from ingestions.sources import SOURCES
+from supabase_upload import to_iso_dates
+
+HASHED = dataclasses.replace(SOURCES['expenses_01'], id_strategy='hash')
+
+# identical rows on different pages get the same -1, -2 ... suffixes as in one batch, no id is upserted twice
+@pytest.mark.parametrize('page_size', [2, 3, 100])
+def test_paged_hash_ids_match_unpaged(monkeypatch, page_size):
+    monkeypatch.setattr(config, 'DEDUP_MODE', 'off')
+    monkeypatch.setattr(config, 'ACCOUNT_CHECK_MODE', 'off')
+    grid = make_grid(HASHED.model, 5, dirty=0)
+    install_fake_sheet({HASHED.tab_name: grid + [grid[1], grid[2], grid[1]]})
+
+    dedup.begin_run([HASHED.key])
+    unpaged = get_validated_data(HASHED)[HASHED.primary_key]
+    paged = pl.concat(page[HASHED.primary_key] for page in iter_validated_pages(HASHED, page_size))
+
+    assert paged.to_list() == unpaged.to_list()
+    assert paged.n_unique() == 8
+
+COA = SOURCES['chart_of_accounts']
+
+# the chart of accounts model is strict: every engine has to reject what pydantic rejects on numericised values
+def test_strict_model_errors_match_across_engines(monkeypatch):
+    grid = make_grid(COA.model, 6, dirty=0, unique_col='account_code')
+    header = grid[0]
+    bad = {2: ('account_name', '123'), 3: ('account_code', '12.5'), 4: ('account_parent_code', 'abc'), 5: ('account_code', '7.0')}
+    for row, (col, value) in bad.items():
+        grid[row][header.index(col)] = value
+    raw = pl.DataFrame(grid[1:], schema=header, orient='row')
+
+    results = {}
+    for mode in ['pydantic', 'typeadapter', 'columnar']:
+        monkeypatch.setattr(config, 'VALIDATION_MODE', mode)
+        validated_df, error_df, error_logs = validate_in_process(COA, raw)
+        results[mode] = (validated_df.height, error_df.select('row_number', 'field', 'error_code').rows(), len(error_logs))
+
+    assert results['pydantic'][1] == [(row + 1, col, 'string_type' if col == 'account_name' else 'int_type') for row, (col, _) in sorted(bad.items())]
+    assert results['typeadapter'] == results['pydantic']
+    assert results['columnar'] == results['pydantic']
+
+EXP = SOURCES['expenses_01']
+
+ENGINES = ('pydantic', 'typeadapter', 'columnar')
+
+# dirty sheet rows, (rows as uploaded, errors) per engine, compared against pydantic
+def engine_results(monkeypatch, spec, raw, modes=ENGINES):
+    results = {}
+    for mode in modes:
+        monkeypatch.setattr(config, 'VALIDATION_MODE', mode)
+        validated_df, error_df, _ = validate_in_process(spec, raw)
+        results[mode] = (to_iso_dates(validated_df).rows(), error_df.select('row_number', 'field', 'error_code').rows())
+    return results
+
+# int fields read the same strings in every engine, 'NaN' or '1e20' are row errors instead of failing the task
+def test_int_parsing_matches_pydantic(monkeypatch):
+    grid = make_grid(EXP.model, 11, dirty=0)
+    header = grid[0]
+    values = ['NaN', 'inf', '1e3', '1e20', '123456789012345678', '1_000', ' 12.00 ', '+5', '12.5', '12,5', '7']
+    for row, value in zip(grid[1:], values):
+        row[header.index('account_code')] = value
+    raw = pl.DataFrame(grid[1:], schema=header, orient='row')
+
+    results = engine_results(monkeypatch, EXP, raw)
+    assert results['typeadapter'] == results['pydantic']
+    assert results['columnar'] == results['pydantic']
+    assert [code for _, _, code in results['pydantic'][1]] == ['int_parsing'] * 6
+    assert [row[header.index('account_code')] for row in results['pydantic'][0]] == [123456789012345678, 1000, 12, 5, 7]
+
+# strict models read numbers like gspread numericise: commas are dropped, so '12,5' is the int 125 and not a string
+def test_strict_numbers_follow_numericise(monkeypatch):
+    grid = make_grid(COA.model, 4, dirty=0, unique_col='account_code')
+    header = grid[0]
+    grid[1][header.index('account_code')] = '1,234'
+    grid[2][header.index('account_name')] = '12,5'
+    grid[3][header.index('account_name')] = '1_000'
+    raw = pl.DataFrame(grid[1:], schema=header, orient='row')
+
+    results = engine_results(monkeypatch, COA, raw)
+    assert results['pydantic'][1] == [(3, 'account_name', 'string_type')]
+    assert results['typeadapter'] == results['pydantic']
+    assert results['columnar'] == results['pydantic']
+
+# whole numbers past the Int64 range are a row error in every engine, they used to fail the frame build of the whole tab
+@pytest.mark.parametrize('spec', [EXP, COA], ids=['lax', 'strict'])
+def test_int_overflow_is_a_row_error(monkeypatch, spec):
+    grid = make_grid(spec.model, 3, dirty=0, unique_col='account_code' if spec is COA else None)
+    grid[1][grid[0].index('account_code')] = '12345678901234567890'
+    grid[2][grid[0].index('account_code')] = '-9223372036854775809'
+    results = engine_results(monkeypatch, spec, pl.DataFrame(grid[1:], schema=grid[0], orient='row'))
+
+    assert results['pydantic'][1] == [(2, 'account_code', 'int_overflow'), (3, 'account_code', 'int_overflow')]
+    assert len(results['pydantic'][0]) == 1
+    assert results['typeadapter'] == results['pydantic']
+    assert results['columnar'] == results['pydantic']
+
+# ISO text with a short year ('26-01-05') is rejected like pydantic does, polars' %Y would read it as the year 26
+def test_short_iso_years_match_pydantic(monkeypatch):
+    grid = make_grid(EXP.model, 3, dirty=0)
+    grid[1][grid[0].index('expense_date')] = '26-01-05'
+    grid[2][grid[0].index('expense_record_date')] = '26-01-05T10:00:00'
+    results = engine_results(monkeypatch, EXP, pl.DataFrame(grid[1:], schema=grid[0], orient='row'))
+
+    assert results['typeadapter'] == results['pydantic']
+    assert results['columnar'] == results['pydantic']
+    assert [(row, field) for row, field, _ in results['pydantic'][1]] == [(2, 'expense_date'), (3, 'expense_record_date')]
+
+# every source on a dirty sheet plus the inputs the engines used to disagree on: same rows, same errors in every engine
+@pytest.mark.parametrize('key', list(SOURCES))
+def test_engines_agree_on_dirty_sheets(monkeypatch, key):
+    spec = SOURCES[key]
+    grid = make_grid(spec.model, 60, dirty=0.3, unique_col=None if spec.id_prefix else spec.primary_key)
+    header = grid[0]
+    int_cols = [c for c in header if c.endswith('account_code') and c != 'account_parent_code']
+    date_cols = [c for c in spec.date_cols if c in header]
+    tricky_ints = ['NaN', 'inf', '1e3', '1e20', '12345678901234567890', '1_000', '12.00', '12,5']
+    tricky_dates = ['1/5/26', '1/5/2026 1:02:03 PM', '2026-01-05 1:02:03 PM', '26-01-05', '1/5/2026', '2026-01-05T10:00:00']
+    for i, value in enumerate(tricky_ints):
+        grid[1 + i][header.index(int_cols[0])] = value
+    for i, value in enumerate(tricky_dates * bool(date_cols)):
+        grid[20 + i][header.index(date_cols[i % len(date_cols)])] = value
+    results = engine_results(monkeypatch, spec, pl.DataFrame(grid[1:], schema=header, orient='row'))
+
+    assert results['pydantic'][0] and results['pydantic'][1]
+    assert results['typeadapter'] == results['pydantic']
+    assert results['columnar'] == results['pydantic']
@@ -0,0 +1,60 @@
+import json
+import polars as pl
+import config
+import dedup
+import error_sink
+import run_report
+from benchmarks.fakes import install_fake_sheet
+from benchmarks.synthetic import make_grid
+from ingestions.engine import get_validated_data, iter_validated_pages
+from ingestions.sources import SOURCES
+
+EXP1 = SOURCES['expenses_01']
+
+# five rows, rows 3 and 5 (sheet rows) have a bad account code, row 5 also has no description
+def install_sheet():
+    grid = make_grid(EXP1.model, 5, dirty=0)
+    header = grid[0]
+    grid[2][header.index('account_code')] = 'abc'
+    grid[4][header.index('account_code')] = 'xyz'
+    grid[4][header.index('expense_description')] = ''
+    install_fake_sheet({EXP1.tab_name: grid})
+    return grid
+
+def read_rejects() -> pl.DataFrame:
+    return pl.read_parquet(error_sink.get_rejects_dir() / EXP1.key / f'{run_report.run_id()}.parquet')
+
+# one row per failed field with the sheet row number and the raw sheet values, paged or not
+def test_rejects_carry_row_numbers_and_raw_values(monkeypatch):
+    monkeypatch.setattr(config, 'DEDUP_MODE', 'off')
+    monkeypatch.setattr(config, 'ACCOUNT_CHECK_MODE', 'off')
+    grid = install_sheet()
+    dedup.begin_run([EXP1.key])
+
+    assert get_validated_data(EXP1).height == 3
+    rejects = read_rejects()
+    assert rejects.select('row_number', 'field', 'error_code').rows() == [
+        (3, 'account_code', 'int_parsing'), (5, 'account_code', 'int_parsing'), (5, 'expense_description', 'value_error'),
+    ]
+    assert set(rejects['source']) == {EXP1.key} and set(rejects['table']) == {EXP1.table}
+    assert json.loads(rejects['raw_values'][0]) == dict(zip(grid[0], grid[2]))
+
+    list(iter_validated_pages(EXP1, 2)) # same file, written once after the last page
+    assert read_rejects().equals(rejects)
+
+# counts across saved runs, most frequent first
+def test_error_counts_across_runs(monkeypatch):
+    errors = pl.DataFrame({'row_number': [3, 5, 5], 'field': ['account_code', 'account_code', 'expense_description'],
+                           'error_code': ['int_parsing', 'int_parsing', 'value_error'], 'message': ['m'] * 3}, schema=error_sink.ERROR_SCHEMA)
+    raw = pl.DataFrame({'account_code': ['1', 'abc', '2', 'xyz']})
+    for run in ['20260101_000000', '20260102_000000']:
+        monkeypatch.setattr(run_report, 'run_id', lambda run=run: run)
+        error_sink.write_rejects(EXP1, error_sink.build_rejects(EXP1, errors, raw))
+
+    assert error_sink.error_counts().rows() == [
+        (EXP1.key, 'account_code', 4, 2, '20260102_000000'), (EXP1.key, 'expense_description', 2, 2, '20260102_000000'),
+    ]
+    assert error_sink.error_counts(by=('error_code',), since='20260102_000000').rows() == [
+        ('int_parsing', 2, 1, '20260102_000000'), ('value_error', 1, 1, '20260102_000000'),
+    ]
+    assert error_sink.error_counts(source='expenses_02').is_empty()
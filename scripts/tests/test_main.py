@@ -0,0 +1,34 @@
+import time
+import polars as pl
+import config
+import dedup
+import main
+import supabase_upload
+from benchmarks.fakes import install_fake_sheet, install_fake_supabase
+from benchmarks.synthetic import make_grid
+from ingestions.sources import SOURCES
+
+EXP1, EXP2 = SOURCES['expenses_01'], SOURCES['expenses_02']
+
+def test_build_tasks_follow_sources_order():
+    tasks = main.build_tasks(['recurring_01', 'expenses_02', 'chart_of_accounts'])
+    assert [task[0] for task in tasks] == [SOURCES[key].task_name for key in ('chart_of_accounts', 'expenses_02', 'recurring_01')]
+
+# --only in reverse order on one worker (--profile): expenses 02 must not wait on expenses 01 queued behind it
+def test_reversed_only_on_one_worker_does_not_stall(monkeypatch):
+    monkeypatch.setattr(dedup, 'WAIT_TIMEOUT', 5)
+    monkeypatch.setattr(config, 'ACCOUNT_CHECK_MODE', 'off')
+    grid = make_grid(EXP1.model, 20, dirty=0)
+    install_fake_sheet({EXP1.tab_name: grid, EXP2.tab_name: grid[:3]})
+    install_fake_supabase({EXP1.schema})
+
+    start = time.perf_counter()
+    try:
+        results = main.run_tasks(main.build_tasks(['expenses_02', 'expenses_01']), max_workers=1)
+    finally:
+        supabase_upload.close_supabase_clients()
+    assert time.perf_counter() - start < dedup.WAIT_TIMEOUT
+    assert None not in results
+
+    report = pl.read_parquet(next((config.log_path_dir / dedup.DUPLICATES_DIR / EXP2.key).glob('*.parquet')))
+    assert report['duplicate_of_source'].to_list() == [EXP1.key, EXP1.key]
@@ -0,0 +1,89 @@
+import atexit
+import io
+import sys
+import threading
+import pytest
+import config
+import output_logging
+from output_logging import Tee
+
+@pytest.fixture
+def restore_streams():
+    saved = sys.stdout, sys.stderr, sys.excepthook, threading.excepthook
+    yield
+    sys.stdout, sys.stderr, sys.excepthook, threading.excepthook = saved
+
+# threads still printing after Ctrl+C / a crash closed the log must not raise on the closed file
+def test_write_after_close_goes_to_terminal(tmp_path, monkeypatch):
+    terminal = io.StringIO()
+    monkeypatch.setattr(sys, 'stdout', terminal)
+    tee = Tee(tmp_path / 'run.log')
+    tee.write('before\n')
+    tee.close()
+    tee.write('after\n')
+    tee.flush()
+
+    assert terminal.getvalue() == 'before\nafter\n'
+    assert (tmp_path / 'run.log').read_text() == 'before\n'
+
+def test_crashed_thread_is_flushed_to_the_log(restore_streams):
+    log_file = output_logging.setup_logging('crash.log')
+    tee = sys.stdout
+    try:
+        thread = threading.Thread(target=lambda: 1 / 0, name='task_0')
+        thread.start()
+        thread.join()
+        text = log_file.read_text() # flushed without closing, the run goes on
+        assert 'Exception in thread task_0' in text and 'ZeroDivisionError' in text
+    finally:
+        tee.close()
+        atexit.unregister(tee.close)
+    assert log_file.parent == config.log_path_dir
+
+# a terminal that holds the writer thread until the test lets it go
+class BlockingTerminal(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def write(self, text):
+        self.release.wait()
+        return super().write(text)
+
+# lines printed while close() waits on the writer are not queued behind _STOP (and lost), they go straight out
+def test_lines_printed_during_close_are_kept(tmp_path, monkeypatch):
+    terminal = BlockingTerminal()
+    monkeypatch.setattr(sys, 'stdout', terminal)
+    tee = Tee(tmp_path / 'run.log')
+    tee.write('first\n')
+    while not tee.queue.empty(): # the writer picked it up and now hangs on the terminal
+        pass
+    closing = threading.Thread(target=tee.close, daemon=True)
+    closing.start()
+    while tee.queue.empty(): # _STOP is queued, close() waits on the writer
+        pass
+    late = threading.Thread(target=tee.write, args=('late\n',), daemon=True)
+    late.start()
+    terminal.release.set()
+    late.join(timeout=5)
+    closing.join(timeout=5)
+
+    assert not closing.is_alive()
+    assert terminal.getvalue() == 'first\nlate\n'
+
+# a dead writer thread never blocks flush() and doesn't swallow later lines
+def test_flush_does_not_hang_when_the_writer_died(tmp_path, monkeypatch):
+    terminal = io.StringIO()
+    monkeypatch.setattr(sys, 'stdout', terminal)
+    tee = Tee(tmp_path / 'run.log')
+    tee.queue.put(output_logging._STOP) # stops the writer the way a crash would
+    tee.writer.join(timeout=5)
+
+    tee.write('still here\n')
+    flushing = threading.Thread(target=tee.flush, daemon=True)
+    flushing.start()
+    flushing.join(timeout=5)
+
+    assert not flushing.is_alive()
+    assert terminal.getvalue() == 'still here\n'
+    tee.close()
@@ -0,0 +1,77 @@
+from datetime import date
+import polars as pl
+import pytest
+import config
+import postgres_loader
+import supabase_upload
+
+pytest.importorskip('psycopg') # optional backend (uv sync --extra postgres)
+
+# records what load_frame sends: the statements and the COPY stream
+class FakeConnection:
+    def __init__(self):
+        self.statements, self.copied, self.committed = [], [], False
+        self.rowcount = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *args):
+        self.committed = exc_type is None
+
+    def cursor(self):
+        return self
+
+    def execute(self, statement):
+        self.statements.append(statement.as_string(None))
+        if statement.as_string(None).startswith('INSERT'):
+            self.rowcount = sum(chunk.count('\n') for chunk in self.copied)
+
+    def copy(self, statement):
+        self.statements.append(statement.as_string(None))
+        return self
+
+    def write(self, data):
+        self.copied.append(data)
+
+def test_merge_statements():
+    create, copy, merge = postgres_loader.build_statements('expenses', 'expenses_01', 'id', ['id', 'amount', 'note'])
+    assert create.as_string(None) == 'CREATE TEMP TABLE "staging_expenses_01" (LIKE "expenses"."expenses_01" INCLUDING DEFAULTS) ON COMMIT DROP'
+    assert copy.as_string(None) == 'COPY "staging_expenses_01" ("id", "amount", "note") FROM STDIN (FORMAT csv)'
+    assert merge.as_string(None) == (
+        'INSERT INTO "expenses"."expenses_01" ("id", "amount", "note") SELECT "id", "amount", "note" FROM "staging_expenses_01" '
+        'ON CONFLICT ("id") DO UPDATE SET "amount" = EXCLUDED."amount", "note" = EXCLUDED."note"'
+    )
+
+# one transaction: staging table, COPY in UPLOAD_BATCH_SIZE chunks, one merge, NULL and '' stay apart in the CSV
+def test_load_frame_copies_then_merges(monkeypatch):
+    connection = FakeConnection()
+    monkeypatch.setattr(postgres_loader, 'get_connection', lambda: connection)
+    monkeypatch.setattr(config, 'UPLOAD_BATCH_SIZE', 2)
+    df = pl.DataFrame({'id': ['A', 'B', 'C'], 'amount': [1.5, None, 3.0], 'note': ['', None, 'a, "b"']})
+
+    report = postgres_loader.load_frame(df, 'expenses', 'expenses_01', 'id')
+
+    assert [statement.split()[0] for statement in connection.statements] == ['CREATE', 'COPY', 'INSERT']
+    assert connection.copied == ['A,1.5,""\nB,,\n', 'C,3.0,"a, ""b"""\n']
+    assert connection.committed
+    assert report['rows_uploaded'] == 3 and report['backend'] == 'postgres'
+
+def test_missing_database_url(monkeypatch):
+    monkeypatch.setattr(config, 'SUPABASE_DB_URL', None)
+    with pytest.raises(EnvironmentError):
+        postgres_loader.get_connection()
+
+# LOAD_BACKEND=postgres sends the prepared frame (timestamp added, dates as ISO strings) to the loader instead of postgrest
+def test_upload_routes_to_the_loader(monkeypatch):
+    connection = FakeConnection()
+    monkeypatch.setattr(postgres_loader, 'get_connection', lambda: connection)
+    monkeypatch.setattr(config, 'LOAD_BACKEND', 'postgres')
+    schema, pk, timestamp_col = next(iter(supabase_upload.TABLE_CONFIGS.values()))
+    table = next(iter(supabase_upload.TABLE_CONFIGS))
+
+    report = supabase_upload.upload_to_supabase(pl.DataFrame({pk: ['A'], 'day': [date(2026, 1, 5)]}), table)
+
+    assert report['table'] == f'{schema}.{table}'
+    assert connection.statements[1].endswith(f'("{pk}", "day", "{timestamp_col}") FROM STDIN (FORMAT csv)')
+    assert connection.copied[0].startswith('A,2026-01-05,')
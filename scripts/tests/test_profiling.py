@@ -0,0 +1,37 @@
+import pstats
+import time
+import pytest
+import profiling
+
+@pytest.fixture(autouse=True)
+def fresh_profiler(monkeypatch):
+    monkeypatch.setattr(profiling, '_enabled', False)
+    monkeypatch.setattr(profiling, '_profile_dir', None)
+    monkeypatch.setattr(profiling, '_results', [])
+
+def busy_loop(seconds: float):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(1000))
+
+# off by default: no files, no footer
+def test_disabled_profiler_is_a_no_op(capsys):
+    with profiling.profile_task('Expenses 01'):
+        busy_loop(0.01)
+    profiling.print_summary()
+    assert profiling._results == [] and capsys.readouterr().out == ''
+
+# one .pstats + .collapsed file per task, the busy function shows up in the footer
+def test_profiled_task_writes_stats_and_stacks(capsys):
+    profile_dir = profiling.enable()
+    with profiling.profile_task('Expenses 01 (Sheet)'):
+        busy_loop(0.2)
+
+    assert sorted(path.name for path in profile_dir.iterdir()) == ['expenses_01_sheet.collapsed', 'expenses_01_sheet.pstats']
+    assert pstats.Stats(str(profile_dir / 'expenses_01_sheet.pstats')).total_calls > 0
+    assert 'busy_loop' in (profile_dir / 'expenses_01_sheet.collapsed').read_text()
+
+    assert any('busy_loop' in where or 'sum' in where for _, _, where, _ in profiling.hot_functions())
+    profiling.print_summary()
+    footer = capsys.readouterr().out
+    assert '- Profiles: ' in footer and '[Expenses 01 (Sheet)]' in footer
@@ -0,0 +1,18 @@
+import sys
+import pytest
+import run_report
+
+# each stage reports its own memory growth, not the process high-water mark every later stage would repeat
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason='resident memory is read from /proc')
+def test_stage_memory_is_a_delta():
+    with run_report.stage('big'):
+        block = bytearray(64 * 1024 * 1024)
+        block[::4096] = b'x' * len(block[::4096]) # touch every page so it's resident
+    del block
+    with run_report.stage('small'):
+        pass
+
+    summary = {s['stage']: s for s in run_report.summarize()}
+    assert summary['big']['max_rss_delta_mb'] >= 50
+    assert abs(summary['small']['max_rss_delta_mb']) < 10
+    assert summary['small']['process_peak_rss_mb'] >= summary['big']['max_rss_delta_mb']
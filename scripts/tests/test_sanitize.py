@@ -0,0 +1,56 @@
+import polars as pl
+import pytest
+import config
+import sanitize
+from benchmarks.fakes import install_fake_sheet
+from benchmarks.synthetic import make_grid
+from ingestions.engine import get_validated_data
+from ingestions.sources import SOURCES
+
+INV, EXP1 = SOURCES['invoices_01'], SOURCES['expenses_01']
+
+def test_sheet_dates_become_iso():
+    values = pl.Series('d', ['3/14/2026', '3/14/2026 09:30:00', '3/14/2026 9:30:00 PM', '2026-03-14T09:30:00', '', 'soon'])
+    parsed, failed = sanitize.sheet_date(values)
+    assert parsed.to_list() == ['2026-03-14T00:00:00', '2026-03-14T09:30:00', '2026-03-14T21:30:00', '2026-03-14T09:30:00', None, 'soon']
+    assert failed == 0 # 'soon' isn't a sheet format, it's passed on for pydantic to reject
+
+# polars' %Y reads 2-digit years as the year 26, strptime rejected them, so must we
+def test_two_digit_years_are_rejected():
+    values = pl.Series('d', ['1/5/26', '1/5/26 10:00:00', '1/5/26 1:02:03 PM', '26-01-05 1:02:03 PM', '1/5/2026'])
+    parsed, failed = sanitize.sheet_date(values)
+    assert parsed.to_list() == [None, None, None, None, '2026-01-05T00:00:00']
+    assert failed == 4
+
+# AM/PM used to be a recurring fees rule only, every tab reads it now
+def test_am_pm_values_are_parsed():
+    values = pl.Series('d', ['1/5/2026 1:02:03 PM', '2026-01-05 1:02:03 PM', '1/5/2026 12:00:00 AM'])
+    parsed, failed = sanitize.sheet_date(values)
+    assert parsed.to_list() == ['2026-01-05T13:02:03', '2026-01-05T13:02:03', '2026-01-05T00:00:00']
+    assert failed == 0
+
+# behavior change: the old invoices_01 sanitizer never imported datetime, so every M/D/YYYY date became NULL and the row was rejected
+def test_invoice_slash_dates_are_accepted():
+    grid = make_grid(INV.model, 2, dirty=0)
+    header = grid[0]
+    for row in grid[1:]:
+        row[header.index('invoice_record_date')] = '3/14/2026 09:30:00'
+        row[header.index('invoice_date')] = '3/14/2026'
+    install_fake_sheet({INV.tab_name: grid})
+
+    df = get_validated_data(INV)
+    assert df.height == 2
+    assert df['invoice_record_date'].cast(pl.String).to_list() == ['2026-03-14T09:30:00'] * 2
+    assert df['invoice_date'].cast(pl.String).to_list() == ['2026-03-14'] * 2
+
+# a 2-digit year is a rejected row in every engine, never an upload dated year 26
+@pytest.mark.parametrize('mode', ['pydantic', 'typeadapter', 'columnar'])
+def test_two_digit_year_rows_are_rejected_in_every_mode(monkeypatch, mode):
+    monkeypatch.setattr(config, 'VALIDATION_MODE', mode)
+    grid = make_grid(EXP1.model, 3, dirty=0)
+    grid[1][grid[0].index('expense_date')] = '1/5/26'
+    grid[2][grid[0].index('expense_record_date')] = '1/5/26 1:02:03 PM'
+    install_fake_sheet({EXP1.tab_name: grid})
+
+    df = get_validated_data(EXP1)
+    assert df.height == 1
@@ -0,0 +1,22 @@
+import main
+import sheet_source
+from benchmarks.fakes import install_fake_sheet
+from benchmarks.synthetic import make_grid
+from ingestions.sources import SOURCES
+
+# --only / daemon cycles download the tabs of their sources only, other tabs are fetched separately when asked for
+def test_only_the_tabs_of_the_run_are_downloaded(monkeypatch):
+    grids = {spec.tab_name: make_grid(spec.model, 3, dirty=0) for spec in SOURCES.values()}
+    install_fake_sheet(grids)
+    requested = []
+    download = sheet_source._spreadsheet.values_batch_get
+    monkeypatch.setattr(sheet_source._spreadsheet, 'values_batch_get', lambda ranges: requested.append(ranges) or download(ranges))
+
+    main.build_tasks(['expenses_01', 'invoices_01'])
+    assert sorted(sheet_source.fetch_all_tabs()) == sorted([SOURCES['expenses_01'].tab_name, SOURCES['invoices_01'].tab_name])
+    assert len(requested) == 1 # still one round trip for the whole run
+
+    coa = SOURCES['chart_of_accounts'].tab_name
+    assert sheet_source.get_grid(coa) == grids[coa]
+    assert sheet_source.get_grid(coa) == grids[coa]
+    assert len(requested) == 2 and coa in requested[1][0]
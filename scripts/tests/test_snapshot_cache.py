@@ -0,0 +1,62 @@
+import pytest
+import config
+import sheet_source
+import snapshot_cache
+from benchmarks.fakes import install_fake_sheet
+from benchmarks.synthetic import make_grid
+from ingestions.sources import SOURCES
+
+EXP1 = SOURCES['expenses_01']
+
+# counts the values_batch_get round trips of the fake sheet
+def count_downloads(monkeypatch) -> list:
+    requested = []
+    download = sheet_source._spreadsheet.values_batch_get
+    monkeypatch.setattr(sheet_source._spreadsheet, 'values_batch_get', lambda ranges: requested.append(ranges) or download(ranges))
+    return requested
+
+# ragged rows and odd tab names come back exactly as the API returned them
+def test_grids_round_trip():
+    grids = {'Expenses 01/2026': [['a', 'b', 'c'], ['1', '', '3'], ['x'], []]}
+    snapshot_cache.save_grids('sheet', 'Title', '2026-01-01T00:00:00Z', list(grids), grids)
+
+    assert snapshot_cache.load_grids('sheet', list(grids), '2026-01-01T00:00:00Z') == grids
+    assert snapshot_cache.load_grids('sheet', list(grids), '2026-02-01T00:00:00Z') is None # the sheet changed since
+    assert snapshot_cache.load_grids('sheet', ['other tab']) is None
+
+# an unchanged sheet is not downloaded again, a changed one is
+def test_unchanged_sheet_is_not_downloaded_again(monkeypatch):
+    monkeypatch.setattr(config, 'SNAPSHOT_CACHE', True)
+    grid = make_grid(EXP1.model, 3, dirty=0)
+    install_fake_sheet({EXP1.tab_name: grid})
+    requested = count_downloads(monkeypatch)
+
+    assert sheet_source.get_grid(EXP1.tab_name) == grid
+    sheet_source.clear_grids() # next run
+    assert sheet_source.get_grid(EXP1.tab_name) == grid
+    assert len(requested) == 1
+
+    monkeypatch.setattr(sheet_source._spreadsheet, 'get_lastUpdateTime', lambda: '2026-02-01T00:00:00.000Z')
+    sheet_source.clear_grids()
+    sheet_source.get_grid(EXP1.tab_name)
+    assert len(requested) == 2
+
+# --from-cache replays the last snapshot without contacting google
+def test_offline_replay(monkeypatch):
+    monkeypatch.setattr(config, 'SNAPSHOT_CACHE', True)
+    monkeypatch.setattr(sheet_source, '_offline', False)
+    grid = make_grid(EXP1.model, 3, dirty=0)
+    install_fake_sheet({EXP1.tab_name: grid})
+    sheet_source.get_grid(EXP1.tab_name)
+
+    sheet_source.reset()
+    monkeypatch.setattr(sheet_source, 'get_spreadsheet', lambda: pytest.fail('google was contacted'))
+    sheet_source.use_snapshots_only()
+    assert sheet_source.get_grid(EXP1.tab_name) == grid
+    assert sheet_source.get_title() == 'Synthetic Benchmark Sheet'
+
+def test_offline_replay_without_a_snapshot_fails(monkeypatch):
+    monkeypatch.setattr(sheet_source, '_offline', False)
+    sheet_source.use_snapshots_only()
+    with pytest.raises(FileNotFoundError):
+        sheet_source.get_grid(EXP1.tab_name)
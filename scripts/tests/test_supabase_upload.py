@@ -0,0 +1,117 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+import httpx
+import polars as pl
+import pytest
+import config
+import supabase_upload
+from benchmarks.fakes import FAKE_KEY, FAKE_URL, FakeSupabase, install_fake_supabase
+from ingestions.sources import SOURCES
+
+EXP1 = SOURCES['expenses_01']
+
+def make_frame(rows: int) -> pl.DataFrame:
+    return pl.DataFrame({EXP1.primary_key: [f'EXP-LN-{i:06d}' for i in range(rows)], 'expense_amount': [float(i) for i in range(rows)]})
+
+# the fake answers every request with the status handed out by `responses(body)`, requests are recorded as parsed bodies
+@pytest.fixture
+def fake_supabase(monkeypatch):
+    monkeypatch.setattr(config, 'LOAD_BACKEND', 'postgrest')
+    monkeypatch.setattr(config, 'UPLOAD_RETRY_BASE_DELAY', 0)
+    bodies, statuses = [], {}
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        bodies.append(body)
+        status = statuses.get('respond', lambda body: 201)(body)
+        return httpx.Response(status, json={'code': str(status), 'message': 'fake error'} if status >= 400 else None)
+    monkeypatch.setattr(FakeSupabase, 'handler', handler)
+    install_fake_supabase({EXP1.schema})
+    yield bodies, statuses
+    supabase_upload.close_supabase_clients()
+
+# rows go up in UPLOAD_BATCH_SIZE batches, the report counts every row once
+def test_upload_is_split_into_batches(monkeypatch, fake_supabase):
+    bodies, _ = fake_supabase
+    monkeypatch.setattr(config, 'UPLOAD_BATCH_SIZE', 10)
+    report = supabase_upload.upload_to_supabase(make_frame(25), EXP1.table)
+
+    assert sorted(len(body) for body in bodies) == [5, 10, 10]
+    assert report['rows_uploaded'] == 25 and report['resume_from'] is None
+    assert [b['status'] for b in report['batches']] == ['success'] * 3
+
+# transient errors (503) are retried, the batch still goes through
+def test_transient_errors_are_retried(monkeypatch, fake_supabase):
+    bodies, statuses = fake_supabase
+    monkeypatch.setattr(config, 'UPLOAD_BATCH_SIZE', 10)
+    statuses['respond'] = lambda body: 503 if len(bodies) == 1 else 201
+    report = supabase_upload.upload_to_supabase(make_frame(5), EXP1.table)
+
+    assert len(bodies) == 2
+    assert report['batches'][0]['attempts'] == 2 and report['rows_uploaded'] == 5
+
+# a batch failing for good doesn't sink the others, the upload is resumed from the failed batch
+def test_failed_batch_can_be_resumed(monkeypatch, fake_supabase):
+    bodies, statuses = fake_supabase
+    monkeypatch.setattr(config, 'UPLOAD_BATCH_SIZE', 10)
+    monkeypatch.setattr(config, 'UPLOAD_MAX_IN_FLIGHT', 1)
+    statuses['respond'] = lambda body: 400 if body[0][EXP1.primary_key] == 'EXP-LN-000010' else 201
+    df = make_frame(30)
+
+    with pytest.raises(supabase_upload.PartialUploadError) as error:
+        supabase_upload.upload_to_supabase(df, EXP1.table)
+    report = error.value.report
+    assert [b['status'] for b in report['batches']] == ['success', 'failed', 'success']
+    assert report['batches'][1]['attempts'] == 1 # a 400 is not retried
+    assert report['resume_from'] == 1
+
+    statuses['respond'] = lambda body: 201
+    bodies.clear()
+    resumed = supabase_upload.upload_to_supabase(df, EXP1.table, start_batch=report['resume_from'])
+    assert [body[0][EXP1.primary_key] for body in bodies] == ['EXP-LN-000010', 'EXP-LN-000020']
+    assert resumed['rows_uploaded'] == 20
+
+# one client per schema for the whole run, created once even when every task asks at the same time
+def test_one_client_per_schema(monkeypatch):
+    monkeypatch.setattr(config, 'SUPABASE_URL', FAKE_URL)
+    monkeypatch.setattr(config, 'SUPABASE_KEY', FAKE_KEY)
+    supabase_upload.close_supabase_clients()
+    try:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            clients = list(executor.map(supabase_upload.get_supabase_client, ['expenses'] * 8 + ['accounting'] * 8))
+        assert len({id(client) for client in clients[:8]}) == 1
+        assert len({id(client) for client in clients[8:]}) == 1
+        assert clients[0] is not clients[8]
+        assert clients[0].postgrest.headers['Accept-Profile'] == 'expenses'
+    finally:
+        supabase_upload.close_supabase_clients()
+    assert not supabase_upload._clients
+
+def test_missing_credentials_fail_before_any_request(monkeypatch):
+    monkeypatch.setattr(config, 'SUPABASE_URL', None)
+    supabase_upload.close_supabase_clients()
+    with pytest.raises(EnvironmentError):
+        supabase_upload.get_supabase_client('expenses')
+
+# the body written from the polars buffers is the same JSON the old per-row dicts produced
+def test_batches_are_serialized_from_the_frame(fake_supabase):
+    bodies, _ = fake_supabase
+    df = pl.DataFrame({
+        EXP1.primary_key: ['EXP-LN-000002', 'EXP-LN-000003'],
+        'expense_record_date': [datetime(2026, 1, 5, 13, 2, 3), None],
+        'expense_date': [date(2026, 1, 5), date(2026, 2, 1)],
+        'account_code': [1000, None],
+        'expense_amount': [12.5, 0.1],
+        'expense_description': ['café "quoted" \\ line\nbreak', None],
+    })
+    supabase_upload.upload_to_supabase(df, EXP1.table)
+
+    [body] = bodies
+    assert [{k: v for k, v in row.items() if k != EXP1.timestamp_col} for row in body] == [
+        {EXP1.primary_key: 'EXP-LN-000002', 'expense_record_date': '2026-01-05T13:02:03', 'expense_date': '2026-01-05',
+         'account_code': 1000, 'expense_amount': 12.5, 'expense_description': 'café "quoted" \\ line\nbreak'},
+        {EXP1.primary_key: 'EXP-LN-000003', 'expense_record_date': None, 'expense_date': '2026-02-01',
+         'account_code': None, 'expense_amount': 0.1, 'expense_description': None},
+    ]
+    assert len({row[EXP1.timestamp_col] for row in body}) == 1
@@ -0,0 +1,47 @@
+import polars as pl
+import pytest
+import config
+import sync_state
+from benchmarks.synthetic import make_grid
+from ingestions.engine import add_transaction_ids, validate_in_process
+from ingestions.sources import SOURCES
+
+EXP1 = SOURCES['expenses_01']
+
+def validated(grid: list[list[str]], mode: str, monkeypatch) -> pl.DataFrame:
+    monkeypatch.setattr(config, 'VALIDATION_MODE', mode)
+    validated_df, _, _ = validate_in_process(EXP1, pl.DataFrame(grid[1:], schema=grid[0], orient='row'))
+    return add_transaction_ids(EXP1, validated_df)
+
+# only new and changed rows go up, keys that left the sheet are reported
+def test_only_changed_rows_are_uploaded(monkeypatch):
+    grid = make_grid(EXP1.model, 4, dirty=0)
+    df = validated(grid, 'pydantic', monkeypatch)
+    _, hashes = sync_state.detect_changes(df, EXP1.table, None)
+    sync_state.save_state(EXP1.table, hashes)
+
+    grid[2][grid[0].index('expense_amount')] = '1.23'
+    changed_df, hashes = sync_state.detect_changes(validated(grid[:-1], 'pydantic', monkeypatch), EXP1.table, sync_state.load_state(EXP1.table))
+
+    assert changed_df[EXP1.primary_key].to_list() == [df[EXP1.primary_key][1]]
+    assert sync_state.report_changes(EXP1.table, sync_state.load_state(EXP1.table), hashes, changed_df.height) == [df[EXP1.primary_key][3]]
+
+# typeadapter frames carry pl.Date / pl.Datetime, the others ISO strings: the same rows must hash the same in every mode
+@pytest.mark.parametrize('mode', ['typeadapter', 'columnar'])
+def test_hashes_match_across_validation_modes(monkeypatch, mode):
+    grid = make_grid(EXP1.model, 5, dirty=0)
+    baseline = sync_state.hash_rows(validated(grid, 'pydantic', monkeypatch), EXP1.table)
+    hashes = sync_state.hash_rows(validated(grid, mode, monkeypatch), EXP1.table)
+    assert hashes.equals(baseline)
+
+    changed_df, _ = sync_state.detect_changes(validated(grid, mode, monkeypatch), EXP1.table, baseline)
+    assert changed_df.is_empty()
+
+# DELTA_SYNC=false ignores the saved state and sends everything
+def test_delta_sync_off_sends_everything(monkeypatch):
+    grid = make_grid(EXP1.model, 3, dirty=0)
+    df = validated(grid, 'pydantic', monkeypatch)
+    sync_state.save_state(EXP1.table, sync_state.hash_rows(df, EXP1.table))
+
+    monkeypatch.setattr(config, 'DELTA_SYNC', False)
+    assert sync_state.load_state(EXP1.table) is None
@@ -0,0 +1,45 @@
+import polars as pl
+import pytest
+import config
+import validation_pool
+from benchmarks.synthetic import make_grid
+from ingestions.engine import validate
+from ingestions.sources import SOURCES
+
+EXP1 = SOURCES['expenses_01']
+
+# chunks cover every row once, in order, each with its real sheet row
+def test_split_keeps_sheet_rows():
+    frame = pl.DataFrame({'row': list(range(11))})
+    chunks = validation_pool.split(frame, 2, workers=2)
+
+    assert [first_row for first_row, _ in chunks] == [2, 5, 8, 11]
+    assert pl.concat([chunk for _, chunk in chunks])['row'].to_list() == list(range(11))
+    assert all(chunk['row'][0] + 2 == first_row for first_row, chunk in chunks)
+
+def test_small_tabs_stay_in_process(monkeypatch):
+    monkeypatch.setattr(config, 'VALIDATION_WORKERS', 4)
+    monkeypatch.setattr(config, 'VALIDATION_PROCESS_MIN_ROWS', 1000)
+    assert not validation_pool.should_use(999) and validation_pool.should_use(1000)
+    monkeypatch.setattr(config, 'VALIDATION_WORKERS', 1)
+    assert not validation_pool.should_use(10**6)
+
+# the worker processes return the same rows, errors and .logs entries as validating in-process, with the real sheet rows
+@pytest.mark.parametrize('mode', ['pydantic', 'columnar'])
+def test_pool_matches_in_process(monkeypatch, mode):
+    monkeypatch.setattr(config, 'VALIDATION_MODE', mode)
+    grid = make_grid(EXP1.model, 40, dirty=0.2)
+    raw = pl.DataFrame(grid[1:], schema=grid[0], orient='row')
+    in_process = validate(EXP1, raw, first_row=102)
+
+    monkeypatch.setattr(config, 'VALIDATION_WORKERS', 2)
+    monkeypatch.setattr(config, 'VALIDATION_PROCESS_MIN_ROWS', 1)
+    try:
+        pooled = validate(EXP1, raw, first_row=102)
+    finally:
+        validation_pool.shutdown()
+
+    assert pooled[0].equals(in_process[0])
+    assert pooled[1].equals(in_process[1]) and not pooled[1].is_empty()
+    assert pooled[2] == in_process[2]
+    assert pooled[1]['row_number'].min() >= 102
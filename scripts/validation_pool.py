@@ -0,0 +1,55 @@
+'''
+VALIDATION POOL
+---------------
+process pool for validating big tabs on every core. sanitize + pydantic are pure python (cpu bound), so threads
+don't help there because of the GIL, separate processes do.
+
+KEY NOTES:
+- Opt-in: VALIDATION_WORKERS > 1 turns it on, tabs (or pages) smaller than VALIDATION_PROCESS_MIN_ROWS still validate in-process
+  because starting workers and shipping the frames costs more than it saves on small tabs.
+- Chunks: the raw frame is split into row ranges, every chunk keeps its real sheet row numbers and results are merged back in sheet order.
+- Spawn: workers are started with the 'spawn' method (same on linux, macos and windows), so they import the pipeline fresh
+  instead of inheriting locks and threads from the parent.
+- One Pool: the pool is created on first use, shared by every task and closed once at the end of the run (shutdown()).
+
+'''
+
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import polars as pl
+import config
+
+CHUNKS_PER_WORKER = 2 # a few chunks per worker so one slow chunk doesn't hold the rest back
+
+_lock = threading.Lock()
+_pool = None
+
+# pool decides: enough workers and enough rows to be worth the process hop
+def should_use(rows: int) -> bool:
+    return config.VALIDATION_WORKERS > 1 and rows >= config.VALIDATION_PROCESS_MIN_ROWS
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=config.VALIDATION_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+# splits the frame into (first sheet row, chunk) pairs, in order
+def split(frame: pl.DataFrame, first_row: int, workers: int) -> list[tuple[int, pl.DataFrame]]:
+    chunk_size = max(1, -(-frame.height // (workers * CHUNKS_PER_WORKER)))
+    return [(first_row + offset, frame.slice(offset, chunk_size)) for offset in range(0, frame.height, chunk_size)]
+
+# runs func(chunk, chunk_first_row, *args) for every chunk on the pool, results come back in sheet order
+def map_chunks(func, frame: pl.DataFrame, first_row: int, *args) -> list:
+    pool = get_pool()
+    futures = [pool.submit(func, chunk, chunk_first_row, *args) for chunk_first_row, chunk in split(frame, first_row, config.VALIDATION_WORKERS)]
+    return [future.result() for future in futures]
+
+def shutdown():
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None